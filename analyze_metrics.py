@@ -1,47 +1,59 @@
 import json
 import os
-import glob
+from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Files only; skip GUI backend probing
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
 
+try:
+    import orjson  # Optional: much faster parsing when many metrics files are loaded
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 def load_metrics_files():
     """Load all metrics files from the current directory."""
-    metrics_files = glob.glob("game_metrics_20250419_203*.json")
     metrics_data = []
     
-    for file in metrics_files:
+    for path in Path('.').glob("game_metrics_20250419_203*.json"):
         try:
-            with open(file, 'r') as f:
-                data = json.load(f)
-                # Extract timestamp from filename
-                timestamp = file.split('_')[2].split('.')[0]
-                data['timestamp'] = timestamp
-                metrics_data.append(data)
+            data = _loads(path.read_bytes())
+            # Extract timestamp from filename
+            data['timestamp'] = path.stem.split('_')[2]
+            metrics_data.append(data)
         except Exception as e:
-            print(f"Error loading {file}: {e}")
+            print(f"Error loading {path}: {e}")
     
     return metrics_data
 
 def create_summary_statistics(metrics_data):
     """Create summary statistics from the metrics data."""
     # Convert to DataFrame for easier analysis
-    df = pd.DataFrame(metrics_data)
-    
-    # Calculate summary statistics
+    df = pd.json_normalize(metrics_data)
+    rate_cols = ['seer_accuracy', 'voting_accuracy', 'seer_reveal_rate', 'suspicion_change_rate',
+                 'vote_discussion_alignment', 'statement_variety_rate', 'werewolf_deception_rate']
+    df[rate_cols] = df[rate_cols].astype('float64')
+    
+    # Calculate summary statistics: one pass for the means, one for the winners
+    means = df[['rounds_played', 'seer_accuracy', 'voting_accuracy', 'seer_reveal_rate',
+                'suspicion_change_rate', 'vote_discussion_alignment',
+                'statement_variety_rate', 'werewolf_deception_rate']].mean()
+    win_counts = df['winner'].value_counts()
     summary = {
         "Total Games": len(df),
-        "Villager Wins": len(df[df['winner'] == "Villagers win!"]),
-        "Werewolf Wins": len(df[df['winner'] == "Werewolves win!"]),
-        "Average Rounds": df['rounds_played'].mean(),
-        "Average Seer Accuracy": df['seer_accuracy'].mean(),
-        "Average Voting Accuracy": df['voting_accuracy'].mean(),
-        "Average Seer Reveal Rate": df['seer_reveal_rate'].mean(),
-        "Average Suspicion Change Rate": df['suspicion_change_rate'].mean(),
-        "Average Vote Discussion Alignment": df['vote_discussion_alignment'].mean(),
-        "Average Statement Variety Rate": df['statement_variety_rate'].mean(),
-        "Average Werewolf Deception Rate": df['werewolf_deception_rate'].mean()
+        "Villager Wins": int(win_counts.get("Villagers win!", 0)),
+        "Werewolf Wins": int(win_counts.get("Werewolves win!", 0)),
+        "Average Rounds": means['rounds_played'],
+        "Average Seer Accuracy": means['seer_accuracy'],
+        "Average Voting Accuracy": means['voting_accuracy'],
+        "Average Seer Reveal Rate": means['seer_reveal_rate'],
+        "Average Suspicion Change Rate": means['suspicion_change_rate'],
+        "Average Vote Discussion Alignment": means['vote_discussion_alignment'],
+        "Average Statement Variety Rate": means['statement_variety_rate'],
+        "Average Werewolf Deception Rate": means['werewolf_deception_rate']
     }
     
     return summary, df
@@ -81,17 +93,26 @@ def generate_report(summary, df):
         # Game-by-game breakdown
         f.write("GAME-BY-GAME BREAKDOWN\n")
         f.write("----------------------\n")
-        for i, row in df.iterrows():
-            f.write(f"Game {i+1} (ID: {row['game_id']})\n")
-            f.write(f"  Winner: {row['winner']}\n")
-            f.write(f"  Rounds: {row['rounds_played']}\n")
-            f.write(f"  Seer Accuracy: {row['seer_accuracy']*100:.2f}%\n")
-            f.write(f"  Voting Accuracy: {row['voting_accuracy']*100:.2f}%\n")
-            f.write(f"  Seer Reveal Rate: {row['seer_reveal_rate']*100:.2f}%\n")
-            f.write(f"  Suspicion Change Rate: {row['suspicion_change_rate']*100:.2f}%\n")
-            f.write(f"  Vote Discussion Alignment: {row['vote_discussion_alignment']*100:.2f}%\n")
-            f.write(f"  Statement Variety Rate: {row['statement_variety_rate']*100:.2f}%\n")
-            f.write(f"  Werewolf Deception Rate: {row['werewolf_deception_rate']*100:.2f}%\n\n")
+        # Pull each column out once instead of building a Series per row
+        cols = {col: df[col].to_numpy() for col in [
+            'game_id', 'winner', 'rounds_played', 'seer_accuracy', 'voting_accuracy',
+            'seer_reveal_rate', 'suspicion_change_rate', 'vote_discussion_alignment',
+            'statement_variety_rate', 'werewolf_deception_rate'
+        ]}
+        games = [
+            f"Game {i+1} (ID: {cols['game_id'][i]})\n"
+            f"  Winner: {cols['winner'][i]}\n"
+            f"  Rounds: {cols['rounds_played'][i]}\n"
+            f"  Seer Accuracy: {cols['seer_accuracy'][i]*100:.2f}%\n"
+            f"  Voting Accuracy: {cols['voting_accuracy'][i]*100:.2f}%\n"
+            f"  Seer Reveal Rate: {cols['seer_reveal_rate'][i]*100:.2f}%\n"
+            f"  Suspicion Change Rate: {cols['suspicion_change_rate'][i]*100:.2f}%\n"
+            f"  Vote Discussion Alignment: {cols['vote_discussion_alignment'][i]*100:.2f}%\n"
+            f"  Statement Variety Rate: {cols['statement_variety_rate'][i]*100:.2f}%\n"
+            f"  Werewolf Deception Rate: {cols['werewolf_deception_rate'][i]*100:.2f}%\n\n"
+            for i in range(len(df))
+        ]
+        f.write("".join(games))
     
     print(f"Report generated: {report_file}")
     return report_file
@@ -105,45 +126,48 @@ def create_visualizations(df):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     # 1. Win distribution pie chart
-    plt.figure(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
     win_counts = df['winner'].value_counts()
-    plt.pie(win_counts, labels=win_counts.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Win Distribution')
-    plt.savefig(f"visualizations/win_distribution_{timestamp}.png")
+    ax.pie(win_counts, labels=win_counts.index, autopct='%1.1f%%', startangle=90)
+    ax.set_title('Win Distribution')
+    fig.savefig(f"visualizations/win_distribution_{timestamp}.png")
+    plt.close(fig)
     
     # 2. Performance metrics bar chart
-    plt.figure(figsize=(12, 8))
+    fig, ax = plt.subplots(figsize=(12, 8))
     metrics = ['seer_accuracy', 'voting_accuracy', 'suspicion_change_rate', 
                'vote_discussion_alignment', 'statement_variety_rate', 'werewolf_deception_rate']
     metric_names = ['Seer Accuracy', 'Voting Accuracy', 'Suspicion Change Rate', 
                    'Vote Discussion Alignment', 'Statement Variety Rate', 'Werewolf Deception Rate']
     
     values = [df[metric].mean() * 100 for metric in metrics]
-    bars = plt.bar(metric_names, values)
-    plt.ylim(0, 100)
-    plt.ylabel('Percentage (%)')
-    plt.title('Average Performance Metrics')
+    bars = ax.bar(metric_names, values)
+    ax.set_ylim(0, 100)
+    ax.set_ylabel('Percentage (%)')
+    ax.set_title('Average Performance Metrics')
     
     # Add value labels on top of bars
     for bar in bars:
         height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 1,
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
                 f'{height:.1f}%', ha='center', va='bottom')
     
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig(f"visualizations/performance_metrics_{timestamp}.png")
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
+    fig.savefig(f"visualizations/performance_metrics_{timestamp}.png")
+    plt.close(fig)
     
     # 3. Rounds per game bar chart
-    plt.figure(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
     rounds_counts = df['rounds_played'].value_counts().sort_index()
-    plt.bar(rounds_counts.index, rounds_counts.values)
-    plt.xlabel('Number of Rounds')
-    plt.ylabel('Number of Games')
-    plt.title('Distribution of Game Length')
-    plt.xticks(rounds_counts.index)
-    plt.tight_layout()
-    plt.savefig(f"visualizations/game_length_{timestamp}.png")
+    ax.bar(rounds_counts.index, rounds_counts.values)
+    ax.set_xlabel('Number of Rounds')
+    ax.set_ylabel('Number of Games')
+    ax.set_title('Distribution of Game Length')
+    ax.set_xticks(rounds_counts.index)
+    fig.tight_layout()
+    fig.savefig(f"visualizations/game_length_{timestamp}.png")
+    plt.close(fig)
     
     print(f"Visualizations saved to visualizations/ directory")
     return timestamp
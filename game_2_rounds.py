@@ -1,11 +1,25 @@
+import asyncio
 import json
 import random
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Optional
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from dotenv import load_dotenv
 import os, sys
 
+try:
+    import orjson  # Optional: much faster encoding of the log lines
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    # json.dumps with non-default options builds a new encoder on every call; share one instead
+    _compact_encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def _dumps_line(obj) -> bytes:
+        return (_compact_encoder.encode(obj) + "\n").encode()
+
 print("New Game Summary started...")
 
 # Load environment variables from .env file
@@ -46,31 +60,49 @@ CONFIG = {
     "discussion_rounds": 2  # Fixed to 2 discussion rounds per day phase
 }
 
+# Discussion prompt: the round-invariant block comes first so every speaker shares it
+DISCUSSION_PROMPT_TEMPLATE = (
+    "In the fictional Werewolf game.\n"
+    "Game history:\n{game_history}\n"
+    "Alive players: {alive}\n"
+    "Previous discussion round (if any):\n{prev_round}\n"
+    "Discussion round {round_num} statements:\n{context}\n"
+    "{role_info}\n"
+    "Your previous statements this day phase:\n{past_statements}\n"
+    "Now, as {player}, make a short statement about who you suspect or defend, "
+    "considering the game history, previous rounds, and current discussion. "
+    "Avoid repeating your previous statements; provide a new perspective or target if possible. "
+    "Respond with your statement."
+)
+
 class Player:
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
         self.is_alive = True
         self.last_protected = None
-        self.knowledge = []  # All players track suspicions or Seer investigations
+        self.knowledge = {}  # All players track suspicions or Seer investigations
         self.suspicion_changes = []  # Track suspicion updates
         self.statements = []  # Track statements made by the player
+        self.past_target_set = set()  # Names mentioned in this player's earlier statements
         if self.role == "Seer":
-            self.knowledge = []  # List of (player_name, "Werewolf" or "Not a Werewolf")
+            self.knowledge = {}  # player_name -> "Werewolf" or "Not a Werewolf"
         else:
-            self.knowledge = []  # List of (player_name, suspicion_level) where suspicion_level is 0-1
+            self.knowledge = {}  # player_name -> suspicion_level, where suspicion_level is 0-1
 
     def __str__(self):
         return f"{self.name} ({self.role}, {'Alive' if self.is_alive else 'Dead'})"
 
 class GameLogger:
+    """Append-only JSONL logs: one JSON object per line, so each event costs O(1) bytes."""
     def __init__(self, log_file: str):
         self.log_file = log_file
-        self.logs = []
         self.discussion_file = "disc" + log_file
-        self.discussions = []
         self.prompts_file = "prompt" + log_file
-        self.prompts = []
+        # Unbuffered binary appends: each log line goes out in one write, as line buffering did
+        self._log_fh = open(self.log_file, 'ab', buffering=0)
+        self._discussion_fh = open(self.discussion_file, 'ab', buffering=0)
+        self._prompts_fh = open(self.prompts_file, 'ab', buffering=0)
 
     def log_event(self, event_type: str, data: Dict):
         log_entry = {
@@ -78,36 +110,34 @@ class GameLogger:
             "event_type": event_type,
             "data": data
         }
-        self.logs.append(log_entry)
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+        self._log_fh.write(_dumps_line(log_entry))
     
     def log_discussion(self, event_type: str, data: Dict):
         disc_entry = {
             "data": data
         }
-        self.discussions.append(disc_entry)
-        with open(self.discussion_file, 'w') as f:
-            json.dump(self.discussions, f, indent=2)
+        self._discussion_fh.write(_dumps_line(disc_entry))
             
     def log_prompts(self, event_type: str, data: Dict):
         prompt_entry = {
             "data": data
         }
-        self.prompts.append(prompt_entry)
-        with open(self.prompts_file, 'w') as f:
-            json.dump(self.prompts, f, indent=2)
+        self._prompts_fh.write(_dumps_line(prompt_entry))
+
+    def close(self):
+        for fh in (self._log_fh, self._discussion_fh, self._prompts_fh):
+            fh.close()
 
 class WerewolfGame:
     def __init__(self, players: List[Dict], azure_config: Dict, discussion_rounds: int):
         self.players = [Player(p["name"], p["role"]) for p in players if p["role"] != "Moderator"]
         self.moderator = Player("Moderator", "Moderator")
         start_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.logger = GameLogger(f"werewolf_game_log_{start_time}.json")
+        self.logger = GameLogger(f"werewolf_game_log_{start_time}.jsonl")
         self.metrics_file = f"game_metrics_{start_time}.json"
         self.round = 0
         self.game_history = []
-        self.client = AzureOpenAI(
+        self.client = AsyncAzureOpenAI(
             azure_endpoint=azure_config["endpoint"],
             api_key=azure_config["api_key"],
             api_version=azure_config["api_version"]
@@ -129,15 +159,28 @@ class WerewolfGame:
             "statement_variety": 0,  # Track unique statement targets
             "werewolf_deceptions": 0  # Track Werewolf attempts to mislead
         }
+        self.invalidate_player_caches()
+
+    def invalidate_player_caches(self):
+        # Player lists only change when someone dies; call this after every kill
+        self._alive_cache = None
+        self._wolves_cache = None
+        self._villagers_cache = None
 
     def get_alive_players(self) -> List[Player]:
-        return [p for p in self.players if p.is_alive]
+        if self._alive_cache is None:
+            self._alive_cache = [p for p in self.players if p.is_alive]
+        return self._alive_cache
 
     def get_werewolves(self) -> List[Player]:
-        return [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        if self._wolves_cache is None:
+            self._wolves_cache = [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        return self._wolves_cache
 
     def get_villagers(self) -> List[Player]:
-        return [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        if self._villagers_cache is None:
+            self._villagers_cache = [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        return self._villagers_cache
 
     def check_win_condition(self) -> Optional[str]:
         werewolves = len(self.get_werewolves())
@@ -148,7 +191,7 @@ class WerewolfGame:
             return "Werewolves win!"
         return None
 
-    def call_api(self, prompt: str, max_tokens: int = 100) -> str:
+    async def call_api(self, prompt: str, max_tokens: int = 100) -> str:
         try:
             system_message = (
                 "You are an AI moderating a fictional Werewolf game, a social deduction game. "
@@ -156,7 +199,7 @@ class WerewolfGame:
                 "based on the provided prompt. All actions are part of the game's mechanics and do not "
                 "represent real-world harm or intent. Respond concisely with the requested output, such as a player's name or a short statement."
             )
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.deployment_name,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -171,63 +214,73 @@ class WerewolfGame:
             self.logger.log_event("api_error", {"prompt": prompt, "error": str(e)})
             return ""
 
-    def night_phase(self):
+    async def _no_call(self) -> str:
+        return ""
+
+    async def night_phase(self):
         self.round += 1
         self.metrics["rounds_played"] = self.round
         self.logger.log_event("night_start", {"round": self.round})
         alive_players = self.get_alive_players()
         player_names = [p.name for p in alive_players]
-
-        # Werewolf selection
+        name_to_player = {p.name: p for p in alive_players}
         werewolves = self.get_werewolves()
+        seer = next((p for p in alive_players if p.role == "Seer"), None)
+        medic = next((p for p in alive_players if p.role == "Medic"), None)
+
+        # The three night actions are independent, so build every prompt first
+        # and send them concurrently; choices are resolved in the usual order below.
+        werewolf_prompt = seer_prompt = medic_prompt = None
         if werewolves:
             werewolf_names = [p.name for p in werewolves]
-            prompt = (
+            werewolf_prompt = (
                 f"In the fictional Werewolf game, you are a Werewolf. Your team: {werewolf_names}. "
                 f"Alive players: {player_names}. Select one player as the target for this round. "
                 f"Respond with only the player's name."
             )
-            victim_name = self.call_api(prompt)
-            victim = next((p for p in alive_players if p.name == victim_name), None)
-            if not victim:
-                victim = random.choice(alive_players)  # Fallback
+        if seer:
+            seer_targets = [p for p in alive_players if p.name != seer.name]  # Exclude self
+            seer_names = [p.name for p in seer_targets]
+            if seer_names:
+                seer_prompt = (
+                    f"In the fictional Werewolf game, you are the Seer. Alive players (excluding yourself): {seer_names}. "
+                    f"Select one player to investigate their role. Respond with only the player's name."
+                )
+        if medic:
+            medic_targets = [p for p in alive_players if p.name != medic.last_protected]
+            medic_names = [p.name for p in medic_targets]
+            medic_prompt = (
+                f"In the fictional Werewolf game, you are the Medic. Alive players: {medic_names}. "
+                f"Select one player to protect this round (cannot be {medic.last_protected or 'none'}). "
+                f"Respond with only the player's name."
+            )
+        victim_name, target_name, protected_name = await asyncio.gather(
+            *(self.call_api(prompt) if prompt else self._no_call()
+              for prompt in (werewolf_prompt, seer_prompt, medic_prompt))
+        )
+
+        # Werewolf selection
+        if werewolves:
+            victim = name_to_player.get(victim_name) or random.choice(alive_players)  # Fallback
             self.logger.log_event("werewolf_choice", {"victim": victim.name})
         else:
             victim = None
 
         # Seer investigation
-        seer = next((p for p in alive_players if p.role == "Seer"), None)
         if seer:
-            valid_targets = [p for p in alive_players if p.name != seer.name]  # Exclude self
-            valid_names = [p.name for p in valid_targets]
-            if valid_names:
-                prompt = (
-                    f"In the fictional Werewolf game, you are the Seer. Alive players (excluding yourself): {valid_names}. "
-                    f"Select one player to investigate their role. Respond with only the player's name."
-                )
-                target_name = self.call_api(prompt)
-                target = next((p for p in valid_targets if p.name == target_name), None)
-                if not target:
-                    target = random.choice(valid_targets)  # Fallback for invalid target
+            if seer_prompt:
+                target = name_to_player.get(target_name) if target_name != seer.name else None
+                target = target or random.choice(seer_targets)  # Fallback for invalid target
                 result = "Werewolf" if target.role == "Werewolf" else "Not a Werewolf"
-                seer.knowledge.append((target.name, result))
+                seer.knowledge[target.name] = result
                 self.metrics["total_seer_investigations"] += 1
                 self.logger.log_event("seer_investigation", {"seer": seer.name, "target": target.name, "result": result})
             else:
                 self.logger.log_event("seer_investigation", {"seer": seer.name, "error": "No valid targets"})
 
         # Medic protection
-        medic = next((p for p in alive_players if p.role == "Medic"), None)
         if medic:
-            valid_targets = [p for p in alive_players if p.name != medic.last_protected]
-            valid_names = [p.name for p in valid_targets]
-            prompt = (
-                f"In the fictional Werewolf game, you are the Medic. Alive players: {valid_names}. "
-                f"Select one player to protect this round (cannot be {medic.last_protected or 'none'}). "
-                f"Respond with only the player's name."
-            )
-            protected_name = self.call_api(prompt)
-            protected = next((p for p in valid_targets if p.name == protected_name), None)
+            protected = name_to_player.get(protected_name) if protected_name != medic.last_protected else None
             if protected:
                 medic.last_protected = protected.name
                 self.logger.log_event("medic_protection", {"medic": medic.name, "protected": protected.name})
@@ -242,14 +295,16 @@ class WerewolfGame:
             self.game_history.append(f"Night {self.round}: No one was killed")
         elif victim:
             victim.is_alive = False
+            self.invalidate_player_caches()
             self.logger.log_event("night_result", {"victim": victim.name, "saved": False})
             self.game_history.append(f"Night {self.round}: {victim.name} was killed")
         else:
             self.game_history.append(f"Night {self.round}: No one was killed")
 
-    def day_phase(self):
+    async def day_phase(self):
         self.logger.log_event("day_start", {"round": self.round})
-        alive_players = self.get_alive_players()
+        alive_players = list(self.get_alive_players())  # Copy: shuffled for speaking order below
+        by_name = {p.name: p for p in alive_players}
         player_names = [p.name for p in alive_players]
         game_history_str = "\n".join(self.game_history) if self.game_history else "No game history yet."
         all_discussions = []
@@ -260,12 +315,22 @@ class WerewolfGame:
             discussion = []
             prompts = []
             previous_statements = []
+            # Previous round's discussion, built once per round as a plain-text transcript
+            previous_round_statements = (
+                "\n".join(f"{s['player']}: {s['statement']}" for s in all_discussions[-1]["statements"])
+                if all_discussions else "None."
+            )
+            round_ctx = {
+                "game_history": game_history_str,
+                "alive": ", ".join(player_names),
+                "prev_round": previous_round_statements,
+                "round_num": discussion_round
+            }
             random.shuffle(alive_players)  # Randomize speaking order
             for player in alive_players:
                 context = "\n".join(previous_statements) if previous_statements else "No statements yet."
-                knowledge_str = "\n".join([f"{name}: {result}" for name, result in player.knowledge]) if player.knowledge else "None yet."
+                knowledge_str = "\n".join([f"{name}: {result}" for name, result in player.knowledge.items()]) if player.knowledge else "None yet."
                 past_statements = "\n".join(player.statements) if player.statements else "None yet."
-                previous_round_statements = json.dumps(all_discussions[-1] if all_discussions else [])  # Previous round's discussion
                 if player.role == "Werewolf":
                     werewolves = self.get_werewolves()
                     teammates = [p.name for p in werewolves if p != player]
@@ -279,19 +344,16 @@ class WerewolfGame:
                 else:
                     role_info = f"You are a {player.role}. Suspicions: {knowledge_str}"
 
-                prompt = (
-                    f"In the fictional Werewolf game, {role_info}\n"
-                    f"Game history:\n{game_history_str}\n"
-                    f"Alive players: {', '.join(player_names)}\n"
-                    f"Discussion round {discussion_round} statements:\n{context}\n"
-                    f"Previous discussion round (if any):\n{previous_round_statements}\n"
-                    f"Your previous statements this day phase:\n{past_statements}\n"
-                    f"Now, as {player.name}, make a short statement about who you suspect or defend, "
-                    f"considering the game history, previous rounds, and current discussion. "
-                    f"Avoid repeating your previous statements; provide a new perspective or target if possible. "
-                    f"Respond with your statement."
-                )
-                statement = self.call_api(prompt, max_tokens=50)
+                prompt = DISCUSSION_PROMPT_TEMPLATE.format_map({
+                    **round_ctx,
+                    "context": context,
+                    "role_info": role_info,
+                    "past_statements": past_statements,
+                    "player": player.name
+                })
+                statement = await self.call_api(prompt, max_tokens=50)
+                suspects = "suspect" in statement.lower()
+                mentioned = [p for p in alive_players if p.name != player.name and p.name in statement]
                 discussion.append({"player": player.name, "statement": statement})
                 prompts.append({"player": player.name, "prompt": prompt})
                 previous_statements.append(f"{player.name}: {statement}")
@@ -307,25 +369,21 @@ class WerewolfGame:
                     self.metrics["werewolf_deceptions"] += 1
 
                 # Update suspicions based on statement
-                for p in alive_players:
-                    if p.name != player.name and p.name in statement:
-                        existing_suspicion = next((level for name, level in player.knowledge if name == p.name and isinstance(level, float)), 0.0)
-                        new_suspicion = min(existing_suspicion + 0.2, 1.0) if "suspect" in statement.lower() else max(existing_suspicion - 0.2, 0.0)
-                        if existing_suspicion != new_suspicion:
-                            player.knowledge = [(name, level) for name, level in player.knowledge if name != p.name]
-                            player.knowledge.append((p.name, new_suspicion))
-                            player.suspicion_changes.append({"round": self.round, "discussion_round": discussion_round, "target": p.name, "new_suspicion": new_suspicion})
-                            self.metrics["suspicion_changes"] += 1
+                for p in mentioned:
+                    existing_suspicion = player.knowledge.get(p.name, 0.0)
+                    if not isinstance(existing_suspicion, float):
+                        existing_suspicion = 0.0
+                    new_suspicion = min(existing_suspicion + 0.2, 1.0) if suspects else max(existing_suspicion - 0.2, 0.0)
+                    if existing_suspicion != new_suspicion:
+                        player.knowledge[p.name] = new_suspicion
+                        player.suspicion_changes.append({"round": self.round, "discussion_round": discussion_round, "target": p.name, "new_suspicion": new_suspicion})
+                        self.metrics["suspicion_changes"] += 1
 
                 # Track statement variety
-                current_targets = [p.name for p in alive_players if p.name in statement and p.name != player.name]
-                past_targets = []
-                for past_stmt in player.statements[:-1]:
-                    for p in alive_players:
-                        if p.name in past_stmt and p.name != player.name:
-                            past_targets.append(p.name)
-                if current_targets and all(target not in past_targets for target in current_targets):
+                current_targets = [p.name for p in mentioned]
+                if current_targets and player.past_target_set.isdisjoint(current_targets):
                     self.metrics["statement_variety"] += 1
+                player.past_target_set.update(current_targets)
 
             all_discussions.append({"discussion_round": discussion_round, "statements": discussion})
             all_prompts.append({"discussion_round": discussion_round, "prompts": prompts})
@@ -334,11 +392,21 @@ class WerewolfGame:
         self.logger.log_discussion("discussion", {"discussions": all_discussions})
         self.logger.log_prompts("discussion", {"prompts": all_prompts})
 
-        # Voting
-        votes = {}
+        # Voting: every ballot depends only on the finished discussion, so all
+        # prompts are built first and the API calls are issued concurrently.
+        discussions_text = "\n".join(
+            f"[R{d['discussion_round']}] {s['player']}: {s['statement']}"
+            for d in all_discussions for s in d["statements"]
+        )
+        vote_prefix = (
+            f"In the fictional Werewolf game.\n"
+            f"Game history:\n{game_history_str}\n"
+            f"All discussion rounds:\n{discussions_text}\n"
+        )
+        ballots = []
         for player in alive_players:
             valid_targets = [p.name for p in alive_players if p.name != player.name]  # Exclude self
-            knowledge_str = "\n".join([f"{name}: {result}" for name, result in player.knowledge]) if player.knowledge else "None yet."
+            knowledge_str = "\n".join([f"{name}: {result}" for name, result in player.knowledge.items()]) if player.knowledge else "None yet."
             if player.role == "Werewolf":
                 werewolves = self.get_werewolves()
                 teammates = [p.name for p in werewolves if p != player]
@@ -352,20 +420,23 @@ class WerewolfGame:
                 role_info = f"You are a {player.role}. Suspicions: {knowledge_str}"
 
             prompt = (
-                f"In the fictional Werewolf game, {role_info}\n"
-                f"Game history:\n{game_history_str}\n"
+                f"{vote_prefix}"
+                f"{role_info}\n"
                 f"Alive players (excluding yourself): {', '.join(valid_targets)}\n"
-                f"All discussion rounds:\n{json.dumps(all_discussions)}\n"
                 f"Based on the game history and all discussions, select one player to vote out this round, "
                 f"or respond with 'Pass' if you lack sufficient information. Respond with only the player's name or 'Pass'."
             )
-            vote = self.call_api(prompt)
+            ballots.append((player, valid_targets, prompt))
+
+        responses = await asyncio.gather(*(self.call_api(prompt) for _, _, prompt in ballots))
+        votes = {}
+        for (player, valid_targets, prompt), vote in zip(ballots, responses):
             if vote == "Pass" or vote not in valid_targets:
                 votes[player.name] = "Pass"
             else:
                 votes[player.name] = vote
                 self.metrics["total_votes"] += 1
-                if next(p for p in alive_players if p.name == vote).role == "Werewolf":
+                if by_name[vote].role == "Werewolf":
                     self.metrics["votes_against_werewolves"] += 1
                 # Check if vote aligns with discussion
                 last_suspicions = [s["target"] for s in player.suspicion_changes if s["round"] == self.round]
@@ -376,16 +447,14 @@ class WerewolfGame:
         self.logger.log_event("votes", votes)
 
         # Tally votes
-        vote_counts = {}
-        for vote in votes.values():
-            if vote != "Pass":
-                vote_counts[vote] = vote_counts.get(vote, 0) + 1
+        vote_counts = Counter(vote for vote in votes.values() if vote != "Pass")
         if vote_counts:
-            max_votes = max(vote_counts.values())
+            max_votes = vote_counts.most_common(1)[0][1]
             eliminated_name = random.choice([name for name, count in vote_counts.items() if count == max_votes])
-            eliminated = next((p for p in alive_players if p.name == eliminated_name), None)
+            eliminated = by_name.get(eliminated_name)
             if eliminated:
                 eliminated.is_alive = False
+                self.invalidate_player_caches()
                 self.logger.log_event("elimination", {"eliminated": eliminated.name})
                 self.game_history.append(f"Day {self.round}: {eliminated.name} was eliminated")
                 # Check if Seer accused a Werewolf correctly
@@ -412,10 +481,10 @@ class WerewolfGame:
         with open(self.metrics_file, 'w') as f:
             json.dump(metrics_summary, f, indent=2)
 
-    def run(self):
+    async def run(self):
         self.logger.log_event("game_start", {"players": [(p.name, p.role) for p in self.players]})
         while True:
-            self.night_phase()
+            await self.night_phase()
             print("Night phase started...")
             win_result = self.check_win_condition()
             if win_result:
@@ -423,7 +492,7 @@ class WerewolfGame:
                 self.logger.log_event("game_end", {"result": win_result})
                 self.save_metrics()
                 break
-            self.day_phase()
+            await self.day_phase()
             print("Day phase started...")
             win_result = self.check_win_condition()
             if win_result:
@@ -431,8 +500,9 @@ class WerewolfGame:
                 self.logger.log_event("game_end", {"result": win_result})
                 self.save_metrics()
                 break
+        self.logger.close()
         print(f"Game Over: {win_result}")
 
 if __name__ == "__main__":
     game = WerewolfGame(CONFIG["players"], CONFIG["azure_openai"], CONFIG["discussion_rounds"])
-    game.run()
\ No newline at end of file
+    asyncio.run(game.run())
\ No newline at end of file
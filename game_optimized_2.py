@@ -1,12 +1,72 @@
+import asyncio
+import atexit
+import heapq
 import json
+import queue
 import random
+import re
 import os
+import pickle
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+from operator import itemgetter
 from datetime import datetime
 from typing import List, Dict, Optional
-from openai import AzureOpenAI
+import httpx
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
 import sys
 
+try:
+    import orjson  # Optional: much faster encoding of the per-event log lines
+
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)  # Newline written in place, no copy
+
+    def _dumps_indented(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    # One shared encoder: json.dumps with options would build a new one per call
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+    _indented_encoder = json.JSONEncoder(indent=2)
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    def _dumps_line(obj) -> bytes:
+        return (_encoder.encode(obj) + "\n").encode()
+
+    def _dumps_indented(obj) -> bytes:
+        return _indented_encoder.encode(obj).encode()
+
+def _write_atomic(path: str, data: bytes):
+    """Write a file so readers only ever see the old contents or the complete new ones"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _ratio(numerator, denominator) -> float:
+    """numerator / denominator, or 0 when nothing was counted"""
+    return numerator / denominator if denominator else 0
+
+try:
+    import h2  # noqa: F401  Optional (httpx[http2]): concurrent requests share one multiplexed connection
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 print("New Game Summary started...")
 
 # Load environment variables from .env file
@@ -45,122 +105,471 @@ CONFIG = {
         "deployment_name": deployment_name,
         "api_version": api_version
     },
-    "discussion_rounds": 2  # Fixed to 2 discussion rounds per day phase
+    "discussion_rounds": 2,  # Fixed to 2 discussion rounds per day phase
+    "max_rounds": 50,  # A game still undecided after this many night/day rounds ends in a draw
+    "max_concurrent": 10,  # Most API requests in flight at once (night actions and votes run concurrently)
+    "verbose": True,  # Print progress as the game runs; when False only the final result is written, in one go
+    "n_games": 1,  # Games played back to back on one API client
+    "seed": None  # Seed for the game's random choices (overridden by a command-line argument); None = unseeded
+}
+
+@dataclass(frozen=True, slots=True)
+class GameConfig:
+    """Read-only view of CONFIG, checked once at import: a missing or misspelled key fails here, not mid-run"""
+    players: tuple
+    azure_openai: dict
+    discussion_rounds: int
+    max_rounds: int
+    max_concurrent: int
+    verbose: bool
+    n_games: int
+    seed: Optional[int]
+
+SETTINGS = GameConfig(**{**CONFIG, "players": tuple(CONFIG["players"])})
+
+# Statement keywords, matched in one scan per statement; each maps to the cue it signals
+STATEMENT_KEYWORDS = re.compile(r"suspect|accuse|innocent|defend", re.IGNORECASE)
+KEYWORD_CUES = {"suspect": "accusation", "accuse": "accusation", "innocent": "defense", "defend": "defense"}
+ROLE_CLAIM = re.compile(r"\b(?:I am|as) the (Seer|Medic)\b", re.IGNORECASE)
+
+def statement_cues(statement: str) -> set:
+    """Return the set of cues ("accusation", "defense") present in a statement"""
+    return {KEYWORD_CUES[m.lower()] for m in STATEMENT_KEYWORDS.findall(statement)}
+
+def claimed_role(statement: str) -> Optional[str]:
+    """Return "Seer" or "Medic" if the statement claims that role, otherwise None"""
+    claim = ROLE_CLAIM.search(statement)
+    return claim.group(1).capitalize() if claim else None
+
+def name_pattern(names: List[str]):
+    """Compile a single alternation matching any of the given player names (longest first)"""
+    return re.compile("|".join(map(re.escape, sorted(names, key=len, reverse=True))))
+
+GAME_STAGES = ("early", "mid", "late")
+
+# Discussion strategy lists per role, with extra entries per game stage. Prompts only ever
+# show the first three entries, so the text for each (role, stage) is built once at load.
+BASE_STRATEGIES = {
+    "Werewolf": [
+        "Try to blend in by accusing other players without drawing attention to yourself",
+        "Defend your fellow werewolves subtly, but don't make it obvious",
+        "Consider fake-claiming a role if pressured (but be careful, as this is risky)",
+        "Try to create confusion by casting doubt on vocal players"
+    ],
+    "Seer": [
+        "Use your knowledge strategically without revealing your role too early",
+        "If you've found a werewolf, consider carefully when to reveal this information",
+        "If pressured, you might need to reveal your role to save yourself or confirm information",
+        "Pay attention to contradictions in player statements compared to your knowledge"
+    ],
+    "Medic": [
+        "Keep your role secret to avoid being targeted by werewolves",
+        "Pay attention to discussions to identify potential Seers to protect",
+        "Vary your protection targets to be unpredictable",
+        "Consider protecting players who are under suspicion but you believe are innocent"
+    ],
+    "Villager": [
+        "Analyze player statements carefully for inconsistencies",
+        "Be careful about who you trust, but work with others to identify werewolves",
+        "Don't reveal too much about your suspicions too early",
+        "Pay attention to voting patterns from previous rounds"
+    ]
+}
+STAGE_STRATEGIES = {
+    ("Werewolf", "early"): ["In early rounds, observe before making strong accusations"],
+    ("Werewolf", "mid"): ["Build on previous discussions to seem consistent",
+                          "If a player is strongly suspected by villagers, join in to blend in"],
+    ("Werewolf", "late"): ["Coordinate with other werewolves to secure eliminations",
+                           "Target confirmed villagers or suspected power roles"],
+    ("Seer", "late"): ["In late game, revealing your role may be necessary to save the village"],
+    ("Medic", "mid"): ["Prioritize protecting players who seem to have important information",
+                       "Don't waste protection on inactive players"],
+    ("Medic", "late"): ["Prioritize protecting players who seem to have important information",
+                        "Don't waste protection on inactive players",
+                        "In late game, consider self-protection if you're being targeted"],
+    ("Villager", "mid"): ["Be suspicious of quiet players who don't contribute",
+                          "Look for patterns in voting - werewolves often protect each other"],
+    ("Villager", "late"): ["Be suspicious of quiet players who don't contribute",
+                           "Look for patterns in voting - werewolves often protect each other",
+                           "In late game, consensus is crucial - try to align with other trusted villagers"]
+}
+ROLE_STRATEGIES = {
+    (role, stage): "\n".join(f"- {s}" for s in (base + STAGE_STRATEGIES.get((role, stage), []))[:3])  # Limit to 3 strategies
+    for role, base in BASE_STRATEGIES.items()
+    for stage in GAME_STAGES
+}
+
+# Extra discussion guidance on top of the role strategies: late-game hints per role, and a reveal
+# hint for a Seer who has found a werewolf after the early game. The full guidance text for every
+# combination is assembled here once, so a discussion turn only looks it up.
+LATE_DISCUSSION_HINTS = {
+    "Werewolf": (
+        "In this late stage, coordinate subtly with your teammates. "
+        "Focus on discrediting players who might be the Seer or Medic. "
+        "If there's a consensus building against a villager, support it to blend in."
+    ),
+    "Medic": (
+        "In late game, your survival is critical. Be careful about revealing your role, "
+        "but focus on identifying werewolves through voting patterns and behavior."
+    ),
+    "Villager": (
+        "In late game, be suspicious of quiet players who haven't contributed meaningfully. "
+        "Look for voting patterns that suggest werewolf coordination."
+    ),
+}
+SEER_REVEAL_HINT = (
+    "You have found a werewolf. Consider revealing your role strategically "
+    "to convince others. In late game, this information is crucial for the village."
+)
+DISCUSSION_GUIDANCE = {
+    (role, stage): strategies + (f"\n{LATE_DISCUSSION_HINTS[role]}" if stage == "late" and role in LATE_DISCUSSION_HINTS else "")
+    for (role, stage), strategies in ROLE_STRATEGIES.items()
+}
+SEER_REVEAL_GUIDANCE = {stage: f"{ROLE_STRATEGIES[('Seer', stage)]}\n{SEER_REVEAL_HINT}" for stage in GAME_STAGES}
+
+VOTING_STRATEGIES = {
+    ("Werewolf", "coordinate"): (
+        "Coordinate votes with your werewolf teammates to eliminate key villagers. "
+        "Target confirmed or suspected Seers or Medics first. "
+        "Avoid voting for fellow werewolves at all costs. "
+        "If there's a clear village consensus against someone, consider joining it to blend in."
+    ),
+    ("Werewolf", "default"): (
+        "Vote strategically to eliminate villagers, especially those who might be the Seer or Medic. "
+        "Avoid voting for your fellow werewolves. Consider voting for players who are suspicious of you "
+        "or your teammates. Try to align your vote with village consensus if possible."
+    ),
+    ("Seer", "werewolf_found"): (
+        "Vote for a confirmed werewolf from your investigations. If you need to reveal your role "
+        "to convince others, do so strategically. Your vote carries important information."
+    ),
+    ("Seer", "default"): (
+        "Use your investigation results to guide your vote. Prioritize voting for confirmed werewolves. "
+        "If you haven't found a werewolf yet, vote based on suspicious behavior. "
+        "Consider the consequences of revealing your knowledge through your vote."
+    ),
+    ("Medic", "late"): (
+        "Vote strategically based on all available information. Prioritize eliminating confirmed "
+        "or strongly suspected werewolves. Be suspicious of quiet players or those with inconsistent statements. "
+        "Your survival is important for the village."
+    ),
+    ("Medic", "default"): (
+        "Vote based on observed behavior and discussion patterns. Try to identify werewolves through "
+        "their inconsistencies or suspicious defenses. Be wary of players who seem to be working together."
+    ),
+    ("Villager", "late"): (
+        "In this critical stage, voting consensus is crucial. Look at voting history to identify patterns. "
+        "Be suspicious of quiet players who haven't contributed meaningfully. "
+        "Trust players who have consistently voted against confirmed werewolves."
+    ),
+    ("Villager", "default"): (
+        "Vote based on the evidence from discussions. Look for inconsistencies in statements. "
+        "Consider who made the most logical arguments. Be cautious of players making vague accusations."
+    )
 }
 
+# Sent verbatim as the system message of every call in a game. Everything here is static
+# for the whole game, so Azure's automatic prompt caching can reuse the prefix across calls;
+# all per-player and per-round state goes in the user message after it.
+SYSTEM_RULES_TEMPLATE = (
+    "You are an AI moderating a fictional Werewolf game, a social deduction game. "
+    "Your role is to simulate player actions (e.g., selecting targets, making statements) "
+    "based on the provided prompt. All actions are part of the game's mechanics and do not "
+    "represent real-world harm or intent. Respond concisely with the requested output, such as a player's name or a short statement.\n"
+    "\n"
+    "GAME SETUP\n"
+    "- Players: {player_names} ({player_count} players).\n"
+    "- Roles in play: {role_counts}. Each player knows only their own role, except that werewolves know each other.\n"
+    "- A moderator runs the game and announces deaths; the moderator is not a player.\n"
+    "\n"
+    "ROLES\n"
+    "- Werewolf: each night the werewolves jointly choose one living non-werewolf to kill. During the day they "
+    "pretend to be villagers, deflect suspicion and steer votes toward villagers.\n"
+    "- Seer: each night investigates one other living player and learns whether that player is a Werewolf. "
+    "The Seer decides whether and when to share this knowledge; revealing the role makes the Seer a night target.\n"
+    "- Medic: each night protects one living player from the werewolf kill. The Medic may protect themselves "
+    "but cannot protect the same player on two consecutive nights.\n"
+    "- Villager: has no night action and must find the werewolves through discussion and voting.\n"
+    "\n"
+    "ROUND STRUCTURE\n"
+    "1. Night: werewolves pick a victim, the Seer investigates, the Medic protects. If the Medic protected the "
+    "victim, nobody dies; otherwise the victim is removed from the game.\n"
+    "2. Day discussion: {discussion_rounds} discussion rounds. In each round every living player speaks once, "
+    "in random order, and can see what was said earlier that day.\n"
+    "3. Day vote: every living player votes for one other living player or passes. The player with the most "
+    "votes is eliminated; ties are broken at random. If everyone passes, nobody is eliminated.\n"
+    "\n"
+    "WIN CONDITIONS\n"
+    "- The villagers (Villagers, Seer and Medic) win when all werewolves are dead.\n"
+    "- The werewolves win when living werewolves are at least as many as living non-werewolves.\n"
+    "\n"
+    "RESPONSE RULES\n"
+    "- When asked for a player's name, reply with exactly one name from the list given, with no punctuation "
+    "or explanation, or 'Pass' when passing is allowed.\n"
+    "- When asked for a statement, reply in character, in the first person, in one or two sentences, "
+    "and name the players you are talking about.\n"
+    "- Dead players cannot be targeted, protected, investigated or voted for.\n"
+    "- Stay consistent with the information you have been given; never reveal hidden roles you have not been told."
+)
+
 class Player:
+    # Fixed attribute set: no per-instance __dict__, and a misspelled attribute assignment raises
+    __slots__ = ("name", "role", "is_alive", "last_protected", "investigations", "suspicions", "suspicion_changes",
+                 "statements", "votes", "voted_for", "activity_level", "activity_statement_count",
+                 "activity_word_count", "role_claims", "past_target_set", "knowledge_version", "knowledge_str_cache")
+
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
         self.is_alive = True
         self.last_protected = None
-        self.knowledge = []  # All players track suspicions or Seer investigations
+        self.investigations = []  # Seer only: list of (player_name, "Werewolf" or "Not a Werewolf")
+        self.suspicions = {}  # player_name -> suspicion_level (0-1), updated in place from discussion
         self.suspicion_changes = []  # Track suspicion updates
         self.statements = []  # Track statements made by the player
         self.votes = []  # Track all votes cast by this player
         self.voted_for = []  # Track who voted for this player
         self.activity_level = 0  # Track how active a player is in discussions
+        self.activity_statement_count = 0  # Meaningful (more than 3 words) statements made
+        self.activity_word_count = 0  # Words across those statements
         self.role_claims = []  # Track any role claims made
-        if self.role == "Seer":
-            self.knowledge = []  # List of (player_name, "Werewolf" or "Not a Werewolf")
-        else:
-            self.knowledge = []  # List of (player_name, suspicion_level) where suspicion_level is 0-1
+        self.past_target_set = set()  # Everyone this player's statements have mentioned so far
+        self.knowledge_version = 0  # Bumped whenever knowledge or suspicions change; keys the formatted-string cache
+        self.knowledge_str_cache = None  # (knowledge_version, formatted knowledge)
 
     def __str__(self):
         return f"{self.name} ({self.role}, {'Alive' if self.is_alive else 'Dead'})"
 
 class GameLogger:
-    def __init__(self, game_id: str):
+    def __init__(self, game_id: str, resume_sizes: Optional[Dict[str, int]] = None):
+        """resume_sizes (file path -> byte size, from a checkpoint) reopens an interrupted game's logs:
+        anything written after the checkpoint is cut off and the rest is loaded back into memory."""
         # Create game-specific directory for all logs
         self.game_dir = f"game_logs_{game_id}"
         os.makedirs(self.game_dir, exist_ok=True)
         
-        # Set up log files
-        self.log_file = os.path.join(self.game_dir, "game_events.json")
-        self.discussion_file = os.path.join(self.game_dir, "discussions.json")
-        self.prompts_file = os.path.join(self.game_dir, "prompts.json")
+        # Set up log files: events are appended as JSON Lines while the game runs,
+        # and finalize() writes the matching JSON arrays once at the end
+        self.log_file = os.path.join(self.game_dir, "game_events.jsonl")
+        self.discussion_file = os.path.join(self.game_dir, "discussions.jsonl")
+        self.prompts_file = os.path.join(self.game_dir, "prompts.jsonl")
         self.metrics_file = os.path.join(self.game_dir, "metrics.json")
-        self.voting_file = os.path.join(self.game_dir, "voting_history.json")
+        self.voting_file = os.path.join(self.game_dir, "voting_history.jsonl")
+        self.metrics_snapshots_file = os.path.join(self.game_dir, "metrics_snapshots.jsonl")
+        self.checkpoint_file = os.path.join(self.game_dir, "checkpoint.pkl")
+        if resume_sizes is not None:
+            for path, size in resume_sizes.items():
+                os.truncate(path, size)
+        self._log_fh = open(self.log_file, 'ab', buffering=1 << 16)
+        self._discussion_fh = open(self.discussion_file, 'ab', buffering=1 << 16)
+        self._prompts_fh = open(self.prompts_file, 'ab', buffering=1 << 16)
+        self._voting_fh = open(self.voting_file, 'ab', buffering=1 << 16)
+        self._metrics_fh = open(self.metrics_snapshots_file, 'ab', buffering=1 << 16)
+        self._files = (self._log_fh, self._discussion_fh, self._prompts_fh, self._voting_fh, self._metrics_fh)
+        
+        # Initialize log containers (kept in memory for queries during the game)
+        self.logs = self._load(self.log_file) if resume_sizes is not None else []
+        self.discussions = self._load(self.discussion_file) if resume_sizes is not None else []
+        self.prompts = self._load(self.prompts_file) if resume_sizes is not None else []
+        self.voting_history = self._load(self.voting_file) if resume_sizes is not None else []
         
-        # Initialize log containers
-        self.logs = []
-        self.discussions = []
-        self.prompts = []
-        self.voting_history = []
+        # Entries are stamped with monotonic ns since this point (cheap, subtractable, immune to clock
+        # changes); the wall-clock start is logged first so the offsets can be placed in time.
+        # A resumed log keeps its original start and carries on from the current wall-clock offset.
+        self.started_ns = self.logs[0]["data"]["wall_clock_ns"] if self.logs else time.time_ns()
+        self._mono_start = time.monotonic_ns() - (time.time_ns() - self.started_ns)
+        
+        # File writes happen on a background thread so the game never waits on disk;
+        # log calls only encode the entry and queue the line
+        self._write_queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._writer_loop, name="game-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self._stop_writer)  # Drain anything still queued if the game exits early
+        if not self.logs:
+            self.log_event("logging_started", {"wall_clock_ns": self.started_ns})
+
+    @staticmethod
+    def _load(path: str) -> List[Dict]:
+        with open(path, 'rb') as f:
+            return [_loads(line) for line in f]
+
+    def file_sizes(self) -> Dict[str, int]:
+        """Current size of each JSONL file; only meaningful right after flush()"""
+        return {fh.name: os.path.getsize(fh.name) for fh in self._files}
+
+    def _writer_loop(self):
+        # Each wake-up drains everything queued so far and writes it as one chunk per file.
+        # Besides (file, line) pairs the queue carries flush requests (an Event) and the stop sentinel.
+        while True:
+            batch = [self._write_queue.get()]
+            while True:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            pending = {}
+            for item in batch:
+                if item is None or isinstance(item, threading.Event):
+                    self._write_pending(pending)
+                    if item is None:
+                        return
+                    for fh in self._files:
+                        fh.flush()
+                        os.fsync(fh.fileno())
+                    item.set()
+                else:
+                    fh, line = item
+                    pending.setdefault(fh, []).append(line)
+            self._write_pending(pending)
+
+    @staticmethod
+    def _write_pending(pending: Dict):
+        for fh, lines in pending.items():
+            fh.write(b"".join(lines))
+        pending.clear()
+
+    def flush(self):
+        """Block until everything logged so far is written and synced to disk"""
+        if self._writer.is_alive():
+            done = threading.Event()
+            self._write_queue.put(done)
+            done.wait()
+
+    def _stop_writer(self):
+        if self._writer.is_alive():
+            self._write_queue.put(None)
+            self._writer.join()
+        for fh in self._files:
+            fh.close()
+        # Drop the exit hook, so a finished logger (and its in-memory logs) isn't kept alive until exit
+        atexit.unregister(self._stop_writer)
+
+    def _append(self, entries: List, fh, entry: Dict):
+        entries.append(entry)
+        self._write_queue.put((fh, _dumps_line(entry)))
 
     def log_event(self, event_type: str, data: Dict):
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "event_type": event_type,
-            "data": data
-        }
-        self.logs.append(log_entry)
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+        self._append(self.logs, self._log_fh,
+                     {"t": time.monotonic_ns() - self._mono_start, "event_type": event_type, "data": data})
     
     def log_discussion(self, event_type: str, data: Dict):
-        disc_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "event_type": event_type,
-            "data": data
-        }
-        self.discussions.append(disc_entry)
-        with open(self.discussion_file, 'w') as f:
-            json.dump(self.discussions, f, indent=2)
+        self._append(self.discussions, self._discussion_fh,
+                     {"t": time.monotonic_ns() - self._mono_start, "event_type": event_type, "data": data})
             
     def log_prompts(self, event_type: str, data: Dict):
-        prompt_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "event_type": event_type,
-            "data": data
-        }
-        self.prompts.append(prompt_entry)
-        with open(self.prompts_file, 'w') as f:
-            json.dump(self.prompts, f, indent=2)
+        self._append(self.prompts, self._prompts_fh,
+                     {"t": time.monotonic_ns() - self._mono_start, "event_type": event_type, "data": data})
     
     def log_votes(self, round_num: int, votes: Dict):
-        vote_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "round": round_num,
-            "votes": votes
-        }
-        self.voting_history.append(vote_entry)
-        with open(self.voting_file, 'w') as f:
-            json.dump(self.voting_history, f, indent=2)
+        self._append(self.voting_history, self._voting_fh,
+                     {"t": time.monotonic_ns() - self._mono_start, "round": round_num, "votes": votes})
+
+    def log_metrics_snapshot(self, phase: str, round_num: int, changed: Dict):
+        """Append the metrics that changed during a phase (file only: the final summary is metrics.json)"""
+        entry = {"t": time.monotonic_ns() - self._mono_start, "phase": phase, "round": round_num, "changed": changed}
+        self._write_queue.put((self._metrics_fh, _dumps_line(entry)))
+
+    def finalize(self):
+        """Write each log once as a JSON array for tools that expect the .json files.
+        Entries carry ns offsets from the logger's start while the game runs; here they become ISO timestamps."""
+        for entries, name in [(self.logs, "game_events.json"), (self.discussions, "discussions.json"),
+                              (self.prompts, "prompts.json"), (self.voting_history, "voting_history.json")]:
+            exported = [
+                {"timestamp": datetime.fromtimestamp((self.started_ns + entry["t"]) / 1e9).isoformat(),
+                 **{k: v for k, v in entry.items() if k != "t"}}
+                for entry in entries
+            ]
+            _write_atomic(os.path.join(self.game_dir, name), _dumps(exported))
+        self._stop_writer()
+
+def create_client(azure_config: Dict, max_concurrent: int) -> AsyncAzureOpenAI:
+    """Async Azure OpenAI client with retries and a keep-alive pool sized for max_concurrent requests"""
+    return AsyncAzureOpenAI(
+        azure_endpoint=azure_config["endpoint"],
+        api_key=azure_config["api_key"],
+        api_version=azure_config["api_version"],
+        # The SDK retries 429s, 5xx, timeouts and connection errors with exponential backoff
+        max_retries=3,
+        timeout=httpx.Timeout(60.0, connect=10.0),  # Short completions; don't wait the SDK's default 10 minutes
+        # Keep-alive pool so concurrent calls reuse TCP/TLS sessions. Discussion is serial and
+        # only needs one connection, so idle ones are kept long enough to survive until the vote.
+        # With HTTP/2 the concurrent night and vote requests are multiplexed over one connection.
+        http_client=DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_concurrent, max_keepalive_connections=max_concurrent, keepalive_expiry=120)
+        )
+    )
 
 class WerewolfGame:
-    def __init__(self, players: List[Dict], azure_config: Dict, discussion_rounds: int, randomize_roles=True):
-        self.game_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    __slots__ = ("game_id", "rng", "verbose", "_status_lines", "players", "player_manifest", "moderator",
+                 "_alive_cache", "_werewolf_cache", "_villager_cache", "_alive_names", "_werewolf_names",
+                 "_alive_wolf_count", "_alive_villager_count", "deaths", "logger", "round", "game_history",
+                 "voting_history", "_vote_history_version", "_voting_history_str", "confirmed_roles",
+                 "_owns_client", "client", "deployment_name", "api_semaphore", "system_message", "_system_turn",
+                 "api_usage", "discussion_rounds", "metrics", "_metrics_logged", "_next_phase", "max_rounds")
+
+    # Game state saved at each phase boundary so an interrupted game can pick up where it stopped
+    _CHECKPOINT_FIELDS = ("rng", "players", "player_manifest", "_alive_wolf_count", "_alive_villager_count", "deaths",
+                          "round", "game_history", "voting_history", "_vote_history_version", "confirmed_roles",
+                          "api_usage", "metrics", "_metrics_logged", "_next_phase")
+
+    def __init__(self, players: List[Dict], azure_config: Dict, discussion_rounds: int, randomize_roles=True, seed: Optional[int] = None,
+                 max_concurrent: int = 10, verbose: bool = True, client: Optional[AsyncAzureOpenAI] = None,
+                 game_id: Optional[str] = None, resume: bool = False, max_rounds: int = 50):
+        """resume=True continues game game_id from the checkpoint saved after its last completed phase"""
+        self.game_id = game_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        # All of the game's own randomness (roles, speaking order, fallbacks, tie-breaks) draws
+        # from this generator, so a seed makes those choices reproducible
+        self.rng = random.Random(seed)
+        self.verbose = verbose
+        self._status_lines = []  # Progress output held back until the end when not verbose
         player_list = [p for p in players if p["role"] != "Moderator"]
         
-        # Randomize roles if requested
+        # Randomize roles if requested: draw a shuffled copy of the roles in one pass
         if randomize_roles:
-            # Extract player names and roles
-            names = [p["name"] for p in player_list]
-            roles = [p["role"] for p in player_list]
-            
-            # Shuffle roles
-            random.shuffle(roles)
-            
-            # Assign shuffled roles to player names
-            self.players = [Player(names[i], roles[i]) for i in range(len(names))]
+            roles = self.rng.sample([p["role"] for p in player_list], len(player_list))
         else:
-            # Use predefined roles
-            self.players = [Player(p["name"], p["role"]) for p in player_list]
+            roles = [p["role"] for p in player_list]
+        self.players = [Player(p["name"], role) for p, role in zip(player_list, roles)]
+        self.player_manifest = tuple((p.name, p.role) for p in self.players)  # Names and roles never change
         
         self.moderator = Player("Moderator", "Moderator")
-        self.logger = GameLogger(self.game_id)
+        # Player lists only change on deaths (see _kill), so they are cached between them
+        self._alive_cache = self._werewolf_cache = self._villager_cache = None
+        self._alive_names = self._werewolf_names = None
+        # Alive counts per side, kept up to date by _kill for the win check
+        self._alive_wolf_count = sum(p.role == "Werewolf" for p in self.players)
+        self._alive_villager_count = len(self.players) - self._alive_wolf_count
+        self.deaths = 0  # Night kills plus day eliminations so far
+        self._next_phase = 0  # Index into run()'s phase order of the phase to play next
+        checkpoint = None
+        if resume:
+            with open(os.path.join(f"game_logs_{self.game_id}", "checkpoint.pkl"), 'rb') as f:
+                checkpoint = pickle.load(f)
+        self.logger = GameLogger(self.game_id, resume_sizes=checkpoint and checkpoint["log_sizes"])
         self.round = 0
         self.game_history = []
         self.voting_history = []  # Enhanced tracking of all votes across rounds
+        self._vote_history_version = 0  # Bumped on every voting_history append
+        self._voting_history_str = (-1, "")  # (version, formatted voting history)
         self.confirmed_roles = {}  # Track publicly revealed/confirmed roles
-        self.client = AzureOpenAI(
-            azure_endpoint=azure_config["endpoint"],
-            api_key=azure_config["api_key"],
-            api_version=azure_config["api_version"]
-        )
+        # A client passed in (e.g. by main() for several games) is shared; otherwise the game makes its own
+        self._owns_client = client is None
+        self.client = client if client is not None else create_client(azure_config, max_concurrent)
         self.deployment_name = azure_config["deployment_name"]
+        self.api_semaphore = asyncio.Semaphore(max_concurrent)  # Cap on in-flight API requests
+        role_counts = Counter(p.role for p in self.players)
+        self.system_message = SYSTEM_RULES_TEMPLATE.format(
+            player_names=", ".join(p.name for p in self.players),
+            player_count=len(self.players),
+            role_counts=", ".join(f"{count} {role}" for role, count in sorted(role_counts.items())),
+            discussion_rounds=discussion_rounds
+        )
+        # The rules message is identical for every request of the game, so its message entry is built once
+        self._system_turn = {"role": "system", "content": self.system_message}
+        self.api_usage = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}  # Prompt cache effectiveness
         self.discussion_rounds = discussion_rounds
+        self.max_rounds = max_rounds  # Hard cap on rounds, so a stalled game can't keep spending API calls
         # Enhanced Metrics tracking
         self.metrics = {
             "rounds_played": 0,
@@ -180,50 +589,105 @@ class WerewolfGame:
             "village_consensus_rate": 0
         }
         
-        # Log the randomized roles if applicable
-        if randomize_roles:
-            self.logger.log_event("randomized_roles", {p.name: p.role for p in self.players})
+        self._metrics_logged = dict(self.metrics)  # Metric values as of the last snapshot
+        
+        if checkpoint is not None:
+            # Overwrite the fresh setup with the saved state; the derived caches rebuild on first use
+            for field in self._CHECKPOINT_FIELDS:
+                setattr(self, field, checkpoint[field])
+            self.logger.log_event("game_resumed", {"round": self.round, "next_phase": self._next_phase})
+        elif randomize_roles:
+            # Log the randomized roles
+            self.logger.log_event("randomized_roles", dict(self.player_manifest))
+
+    def _record(self, event_type: str, data: Dict):
+        """Log an event and apply the metric update it implies, so the two can't drift apart"""
+        self.logger.log_event(event_type, data)
+        if event_type == "night_start":
+            self.metrics["rounds_played"] = data["round"]
+        elif event_type == "seer_investigation":
+            if "result" in data:
+                self.metrics["total_seer_investigations"] += 1
+        elif event_type == "night_result":
+            if data["saved"]:
+                self.metrics["medic_successful_protections"] += 1
+        elif event_type == "game_end":
+            self.metrics["winner"] = data["result"]
+
+    def _kill(self, player: Player):
+        """Remove a player from the game; the cached player lists are rebuilt on next use"""
+        player.is_alive = False
+        self.deaths += 1
+        if player.role == "Werewolf":
+            self._alive_wolf_count -= 1
+        else:
+            self._alive_villager_count -= 1
+        self._alive_cache = self._werewolf_cache = self._villager_cache = None
+        self._alive_names = self._werewolf_names = None
 
     def get_alive_players(self) -> List[Player]:
-        return [p for p in self.players if p.is_alive]
+        if self._alive_cache is None:
+            self._alive_cache = [p for p in self.players if p.is_alive]
+        return self._alive_cache
 
     def get_werewolves(self) -> List[Player]:
-        return [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        if self._werewolf_cache is None:
+            self._werewolf_cache = [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        return self._werewolf_cache
+
+    def get_alive_names(self) -> List[str]:
+        if self._alive_names is None:
+            self._alive_names = [p.name for p in self.get_alive_players()]
+        return self._alive_names
+
+    def get_werewolf_names(self) -> List[str]:
+        if self._werewolf_names is None:
+            self._werewolf_names = [p.name for p in self.get_werewolves()]
+        return self._werewolf_names
 
     def get_villagers(self) -> List[Player]:
-        return [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        if self._villager_cache is None:
+            self._villager_cache = [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        return self._villager_cache
 
     def check_win_condition(self) -> Optional[str]:
-        werewolves = len(self.get_werewolves())
-        villagers = len(self.get_villagers())
-        if werewolves == 0:
+        if self._alive_wolf_count == 0:
             return "Villagers win!"
-        if werewolves >= villagers:
+        if self._alive_wolf_count >= self._alive_villager_count:
             return "Werewolves win!"
         return None
 
-    def call_api(self, prompt: str, max_tokens: int = 100) -> str:
+    async def call_api(self, prompt: str, max_tokens: int = 100) -> str:
+        return (await self.call_api_samples(prompt, 1, max_tokens))[0]
+
+    async def call_api_samples(self, prompt: str, n: int, max_tokens: int = 100) -> List[str]:
+        """Request n sampled completions of the same prompt in one round trip"""
         try:
-            system_message = (
-                "You are an AI moderating a fictional Werewolf game, a social deduction game. "
-                "Your role is to simulate player actions (e.g., selecting targets, making statements) "
-                "based on the provided prompt. All actions are part of the game's mechanics and do not "
-                "represent real-world harm or intent. Respond concisely with the requested output, such as a player's name or a short statement."
-            )
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.5  # Slightly increased for more varied responses
-            )
-            return response.choices[0].message.content.strip()
+            async with self.api_semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=[
+                        self._system_turn,
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.5,  # Slightly increased for more varied responses
+                    n=n
+                )
+            usage = getattr(response, "usage", None)
+            if usage:
+                details = getattr(usage, "prompt_tokens_details", None)
+                self.api_usage["requests"] += 1
+                self.api_usage["prompt_tokens"] += usage.prompt_tokens
+                self.api_usage["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+            return [(choice.message.content or "").strip() for choice in response.choices]
         except Exception as e:
             print(f"API error: {e}")
             self.logger.log_event("api_error", {"prompt": prompt, "error": str(e)})
-            return ""
+            return [""] * n
+
+    async def _no_call(self) -> str:
+        return ""
 
     def get_summarized_history(self):
         """Create a concise summary of game history"""
@@ -241,27 +705,33 @@ class WerewolfGame:
         return summary
 
     def format_player_knowledge(self, player):
-        """Format player knowledge in a structured way"""
-        if not player.knowledge:
-            return "No specific knowledge yet."
-        
+        """Format player knowledge in a structured way (cached until the knowledge changes)"""
+        cache = player.knowledge_str_cache
+        if cache is None or cache[0] != player.knowledge_version:
+            cache = player.knowledge_str_cache = (player.knowledge_version, self._render_player_knowledge(player))
+        return cache[1]
+
+    def _render_player_knowledge(self, player):
         if player.role == "Seer":
+            if not player.investigations:
+                return "No specific knowledge yet."
             # Format Seer's investigation results
-            return "\n".join([f"- {name}: {result}" for name, result in player.knowledge])
+            return "\n".join([f"- {name}: {result}" for name, result in player.investigations])
         else:
+            if not player.suspicions:
+                return "No specific knowledge yet."
             # Format suspicion levels in a more readable way
             suspicions = []
-            for name, level in player.knowledge:
-                if isinstance(level, float):
-                    if level >= 0.7:
-                        suspicions.append(f"- {name}: Highly suspicious")
-                    elif level >= 0.4:
-                        suspicions.append(f"- {name}: Somewhat suspicious")
-                    elif level <= 0.2:
-                        suspicions.append(f"- {name}: Likely innocent")
-                    else:
-                        suspicions.append(f"- {name}: Neutral/Uncertain")
-            return "\n".join(suspicions) if suspicions else "No clear suspicions yet."
+            for name, level in player.suspicions.items():
+                if level >= 0.7:
+                    suspicions.append(f"- {name}: Highly suspicious")
+                elif level >= 0.4:
+                    suspicions.append(f"- {name}: Somewhat suspicious")
+                elif level <= 0.2:
+                    suspicions.append(f"- {name}: Likely innocent")
+                else:
+                    suspicions.append(f"- {name}: Neutral/Uncertain")
+            return "\n".join(suspicions)
 
     def summarize_statements(self, all_discussions):
         """Summarize previous discussion rounds to focus on key points"""
@@ -273,23 +743,18 @@ class WerewolfGame:
             round_num = disc_round.get("discussion_round", "?")
             statements = disc_round.get("statements", [])
             
-            # Extract accusations and defenses
-            accusations = []
-            defenses = []
+            # Count accusations and defenses (only the totals are reported)
+            accusations = defenses = 0
             for stmt in statements:
-                player = stmt.get("player", "Unknown")
-                statement = stmt.get("statement", "")
-                
-                if "suspect" in statement.lower() or "accuse" in statement.lower():
-                    accusations.append(f"{player} accused/suspected someone")
-                if "innocent" in statement.lower() or "defend" in statement.lower():
-                    defenses.append(f"{player} defended someone")
+                cues = statement_cues(stmt.get("statement", ""))
+                accusations += "accusation" in cues
+                defenses += "defense" in cues
             
             round_summary = f"Round {round_num}: "
             if accusations:
-                round_summary += f"{len(accusations)} accusations; "
+                round_summary += f"{accusations} accusations; "
             if defenses:
-                round_summary += f"{len(defenses)} defenses"
+                round_summary += f"{defenses} defenses"
             
             summaries.append(round_summary)
         
@@ -301,35 +766,37 @@ class WerewolfGame:
             return "No discussions yet."
         
         # Flatten all statements across rounds
-        all_statements = []
-        for disc_round in all_discussions:
-            for stmt in disc_round.get("statements", []):
-                all_statements.append(stmt)
+        all_statements = chain.from_iterable(d.get("statements", ()) for d in all_discussions)
         
         # Extract statements that mention players
+        alive_names = self.get_alive_names()
+        names_re = name_pattern(alive_names)
+        order = {name: i for i, name in enumerate(alive_names)}
         player_mentions = {}
         for stmt in all_statements:
             speaker = stmt.get("player", "Unknown")
             statement = stmt.get("statement", "")
             
-            for player in self.get_alive_players():
-                if player.name in statement and player.name != speaker:
-                    if player.name not in player_mentions:
-                        player_mentions[player.name] = []
-                    player_mentions[player.name].append(f"{speaker}: {statement}")
+            # Mentioned names in alive-player order, each once per statement
+            for name in sorted(set(names_re.findall(statement)) - {speaker}, key=order.get):
+                mentions = player_mentions.setdefault(name, [])
+                if len(mentions) < 2:  # Only the first 2 mentions per player are reported
+                    mentions.append(f"{speaker}: {statement}")
         
-        # Format the most significant mentions (limit to top 2 per player)
-        key_mentions = []
-        for player_name, mentions in player_mentions.items():
-            if mentions:
-                key_mentions.append(f"About {player_name}:")
-                for mention in mentions[:2]:  # Limit to 2 mentions per player
-                    key_mentions.append(f"- {mention}")
-        
-        return "\n".join(key_mentions) if key_mentions else "No significant accusations or defenses yet."
+        # Format the most significant mentions in a single join
+        key_mentions = "\n".join(
+            f"About {player_name}:\n" + "\n".join(f"- {mention}" for mention in mentions)
+            for player_name, mentions in player_mentions.items()
+        )
+        return key_mentions or "No significant accusations or defenses yet."
 
     def format_voting_history(self):
-        """Format the voting history in a readable way"""
+        """Format the voting history in a readable way (cached until a new round of votes is added)"""
+        if self._voting_history_str[0] != self._vote_history_version:
+            self._voting_history_str = (self._vote_history_version, self._render_voting_history())
+        return self._voting_history_str[1]
+
+    def _render_voting_history(self):
         if not self.voting_history:
             return "No voting history yet."
         
@@ -346,293 +813,163 @@ class WerewolfGame:
         
         return "\n\n".join(voting_summary)
     
-    def analyze_player_activity(self, player, all_discussions):
-        """Analyze how active/vocal a player has been"""
-        if not all_discussions:
-            return 0
-        
-        # Count meaningful statements (more than just a few words)
-        statement_count = 0
-        total_words = 0
-        
-        for disc_round in all_discussions:
-            # Handle both dictionary and list formats
-            if isinstance(disc_round, dict):
-                statements = disc_round.get("statements", [])
-            else:
-                statements = disc_round
-            
-            for stmt in statements:
-                if stmt.get("player") == player.name:
-                    words = stmt.get("statement", "").split()
-                    if len(words) > 3:  # Consider meaningful if more than 3 words
-                        statement_count += 1
-                        total_words += len(words)
-        
-        # Calculate activity score (0-10 scale)
+    def analyze_player_activity(self, player):
+        """Analyze how active/vocal a player has been (from counters kept as statements are made)"""
+        statement_count = player.activity_statement_count
         if statement_count == 0:
             return 0
         
-        avg_words = total_words / statement_count
+        avg_words = player.activity_word_count / statement_count
         activity_score = min(statement_count * (avg_words / 5), 10)  # Scale based on count and length
         
         return round(activity_score, 1)
     
-    def get_role_strategy(self, player, discussion_round):
-        """Provide role-specific strategy guidance based on game state"""
-        alive_players = self.get_alive_players()
-        game_stage = "early" if self.round <= 2 else "mid" if self.round <= 4 else "late"
-        
-        if player.role == "Werewolf":
-            strategies = [
-                "Try to blend in by accusing other players without drawing attention to yourself",
-                "Defend your fellow werewolves subtly, but don't make it obvious",
-                "Consider fake-claiming a role if pressured (but be careful, as this is risky)",
-                "Try to create confusion by casting doubt on vocal players"
-            ]
-            
-            # Enhanced werewolf strategy based on game stage
-            if game_stage == "early":
-                strategies.append("In early rounds, observe before making strong accusations")
-            elif game_stage == "mid":
-                strategies.append("Build on previous discussions to seem consistent")
-                strategies.append("If a player is strongly suspected by villagers, join in to blend in")
-            else:  # late game
-                strategies.append("Coordinate with other werewolves to secure eliminations")
-                strategies.append("Target confirmed villagers or suspected power roles")
-                
-            if len(self.get_werewolves()) < len(alive_players) // 3:
-                strategies.append("Your team is outnumbered - focus on survival rather than aggression")
-                
-            return "\n".join([f"- {s}" for s in strategies[:3]])  # Limit to 3 strategies
-            
-        elif player.role == "Seer":
-            strategies = [
-                "Use your knowledge strategically without revealing your role too early",
-                "If you've found a werewolf, consider carefully when to reveal this information",
-                "If pressured, you might need to reveal your role to save yourself or confirm information",
-                "Pay attention to contradictions in player statements compared to your knowledge"
-            ]
-            
-            # Enhanced seer strategy based on game stage
-            werewolf_found = any(result == "Werewolf" for _, result in player.knowledge)
-            if werewolf_found:
-                if game_stage == "early":
-                    strategies.append("You've identified a werewolf early - consider waiting before revealing")
-                else:
-                    strategies.append("You've identified a werewolf - consider revealing this to unite the village")
-            
-            # New strategy for late game
-            if game_stage == "late":
-                strategies.append("In late game, revealing your role may be necessary to save the village")
-                
-            return "\n".join([f"- {s}" for s in strategies[:3]])  # Limit to 3 strategies
-            
-        elif player.role == "Medic":
-            strategies = [
-                "Keep your role secret to avoid being targeted by werewolves",
-                "Pay attention to discussions to identify potential Seers to protect",
-                "Vary your protection targets to be unpredictable",
-                "Consider protecting players who are under suspicion but you believe are innocent"
-            ]
-            
-            # Enhanced medic strategy based on game stage
-            if game_stage == "mid" or game_stage == "late":
-                strategies.append("Prioritize protecting players who seem to have important information")
-                strategies.append("Don't waste protection on inactive players")
-            
-            if game_stage == "late":
-                strategies.append("In late game, consider self-protection if you're being targeted")
-                
-            return "\n".join([f"- {s}" for s in strategies[:3]])  # Limit to 3 strategies
-            
-        else:  # Villager
-            strategies = [
-                "Analyze player statements carefully for inconsistencies",
-                "Be careful about who you trust, but work with others to identify werewolves",
-                "Don't reveal too much about your suspicions too early",
-                "Pay attention to voting patterns from previous rounds"
-            ]
-            
-            # Enhanced villager strategy based on game stage
-            if game_stage == "mid" or game_stage == "late":
-                strategies.append("Be suspicious of quiet players who don't contribute")
-                strategies.append("Look for patterns in voting - werewolves often protect each other")
-            
-            if game_stage == "late":
-                strategies.append("In late game, consensus is crucial - try to align with other trusted villagers")
-                
-            return "\n".join([f"- {s}" for s in strategies[:3]])  # Limit to 3 strategies
+    def get_game_stage(self) -> str:
+        return "early" if self.round <= 2 else "mid" if self.round <= 4 else "late"
 
     def get_voting_strategy(self, player):
         """Provide voting strategy guidance based on role and game state"""
-        game_stage = "early" if self.round <= 2 else "mid" if self.round <= 4 else "late"
+        game_stage = self.get_game_stage()
         
         if player.role == "Werewolf":
-            werewolves = self.get_werewolves()
-            if game_stage == "late" and len(werewolves) > 1:
-                return (
-                    "Coordinate votes with your werewolf teammates to eliminate key villagers. "
-                    "Target confirmed or suspected Seers or Medics first. "
-                    "Avoid voting for fellow werewolves at all costs. "
-                    "If there's a clear village consensus against someone, consider joining it to blend in."
-                )
-            else:
-                return (
-                    "Vote strategically to eliminate villagers, especially those who might be the Seer or Medic. "
-                    "Avoid voting for your fellow werewolves. Consider voting for players who are suspicious of you "
-                    "or your teammates. Try to align your vote with village consensus if possible."
-                )
-                
+            situation = "coordinate" if game_stage == "late" and len(self.get_werewolves()) > 1 else "default"
         elif player.role == "Seer":
-            werewolf_found = any(result == "Werewolf" for _, result in player.knowledge)
-            if werewolf_found and game_stage != "early":
-                return (
-                    "Vote for a confirmed werewolf from your investigations. If you need to reveal your role "
-                    "to convince others, do so strategically. Your vote carries important information."
-                )
-            else:
-                return (
-                    "Use your investigation results to guide your vote. Prioritize voting for confirmed werewolves. "
-                    "If you haven't found a werewolf yet, vote based on suspicious behavior. "
-                    "Consider the consequences of revealing your knowledge through your vote."
-                )
-                
-        elif player.role == "Medic":
-            if game_stage == "late":
-                return (
-                    "Vote strategically based on all available information. Prioritize eliminating confirmed "
-                    "or strongly suspected werewolves. Be suspicious of quiet players or those with inconsistent statements. "
-                    "Your survival is important for the village."
-                )
-            else:
-                return (
-                    "Vote based on observed behavior and discussion patterns. Try to identify werewolves through "
-                    "their inconsistencies or suspicious defenses. Be wary of players who seem to be working together."
-                )
-                
-        else:  # Villager
-            if game_stage == "late":
-                return (
-                    "In this critical stage, voting consensus is crucial. Look at voting history to identify patterns. "
-                    "Be suspicious of quiet players who haven't contributed meaningfully. "
-                    "Trust players who have consistently voted against confirmed werewolves."
-                )
-            else:
-                return (
-                    "Vote based on the evidence from discussions. Look for inconsistencies in statements. "
-                    "Consider who made the most logical arguments. Be cautious of players making vague accusations."
-                )
+            werewolf_found = any(result == "Werewolf" for _, result in player.investigations)
+            situation = "werewolf_found" if werewolf_found and game_stage != "early" else "default"
+        else:  # Medic and Villager
+            situation = "late" if game_stage == "late" else "default"
+        return VOTING_STRATEGIES[(player.role, situation)]
 
     def identify_key_targets(self, player_role):
         """Identify key targets based on role and game state"""
         alive_players = self.get_alive_players()
+        # Werewolves never target or protect their own, so every bucket draws from the
+        # non-werewolves; one pass fills the buckets, which are then joined in priority order
+        candidates = [p for p in alive_players if p.role != "Werewolf"]
         
         if player_role == "Werewolf":
             # Werewolves should target Seers, Medics, or vocal villagers
-            # First, look for confirmed or suspected power roles
-            targets = []
-            
-            # Find anyone who's claimed to be Seer or Medic
-            for player in alive_players:
-                if player.role != "Werewolf" and any("I am the Seer" in stmt or "I am the Medic" in stmt for stmt in player.statements):
-                    targets.append((player.name, 1.0))  # High priority
-            
-            # Find vocal players with high activity (likely influential)
-            for player in alive_players:
-                if player.role != "Werewolf" and player.activity_level >= 7:
-                    targets.append((player.name, 0.8))  # High priority
+            claimed = []  # Anyone who's claimed to be Seer or Medic
+            vocal = []  # Vocal players with high activity (likely influential)
+            for player in candidates:
+                if any(ROLE_CLAIM.search(stmt) for stmt in player.statements):
+                    claimed.append((player.name, 1.0))  # High priority
+                if player.activity_level >= 7:
+                    vocal.append((player.name, 0.8))  # High priority
+            targets = claimed + vocal
             
             # If no clear targets, find players who are suspicious of werewolves
             if not targets:
-                for player in alive_players:
-                    if player.role != "Werewolf":
-                        for werewolf in self.get_werewolves():
-                            if any(werewolf.name in stmt and "suspect" in stmt for stmt in player.statements):
-                                targets.append((player.name, 0.7))  # Medium-high priority
+                werewolf_names = self.get_werewolf_names()
+                for player in candidates:
+                    for stmt in player.statements:
+                        if "suspect" in stmt and any(name in stmt for name in werewolf_names):
+                            targets.append((player.name, 0.7))  # Medium-high priority
+                            break
             
             # If still no clear targets, target random villagers
             if not targets:
-                for player in alive_players:
-                    if player.role != "Werewolf":
-                        targets.append((player.name, 0.5))  # Medium priority
+                targets = [(player.name, 0.5) for player in candidates]  # Medium priority
             
             return targets
             
         elif player_role == "Medic":
             # Medics should protect Seers, vocal villagers, or themselves if targeted
-            targets = []
-            
-            # First, find confirmed or suspected Seers
-            for player in alive_players:
-                if player.role != "Werewolf" and any("I am the Seer" in stmt for stmt in player.statements):
-                    targets.append((player.name, 1.0))  # High priority
-            
-            # Next, find vocal players who might be targeted
-            for player in alive_players:
-                if player.role != "Werewolf" and player.activity_level >= 7:
-                    targets.append((player.name, 0.8))  # High priority
-            
-            # Find players who are suspected by others (might be targeted)
-            for player in alive_players:
-                if player.role != "Werewolf":
-                    suspicion_count = 0
-                    for other in alive_players:
-                        if other != player and any(player.name in stmt and "suspect" in stmt for stmt in other.statements):
-                            suspicion_count += 1
-                    if suspicion_count >= 2:  # If multiple players suspect them
-                        targets.append((player.name, 0.7))  # Medium-high priority
+            claimed = []  # Confirmed or suspected Seers
+            vocal = []  # Vocal players who might be targeted
+            suspected = []  # Players suspected by others (might be targeted)
+            # How many other players have suspected each player: one regex pass per statement
+            names_re = name_pattern(self.get_alive_names())
+            suspicion_counts = Counter()
+            for other in alive_players:
+                named = set()
+                for stmt in other.statements:
+                    if "suspect" in stmt:
+                        named.update(names_re.findall(stmt))
+                named.discard(other.name)
+                suspicion_counts.update(named)
+            for player in candidates:
+                if any(claimed_role(stmt) == "Seer" for stmt in player.statements):
+                    claimed.append((player.name, 1.0))  # High priority
+                if player.activity_level >= 7:
+                    vocal.append((player.name, 0.8))  # High priority
+                if suspicion_counts[player.name] >= 2:  # If multiple players suspect them
+                    suspected.append((player.name, 0.7))  # Medium-high priority
+            targets = claimed + vocal + suspected
             
             # Self-protection in late game if there's risk
-            if self.round >= 3:
-                targets.append((player.name, 0.6))  # Medium priority
+            medic = next((p for p in alive_players if p.role == "Medic"), None)
+            if self.round >= 3 and medic:
+                targets.append((medic.name, 0.6))  # Medium priority
             
             return targets
         
         return []  # Default empty list for other roles
 
     def print_round_summary(self):
-        """Print a summary of the current game state after each round"""
+        """Print a summary of the current game state after each round (verbose only)"""
+        if not self.verbose:
+            return  # Batch runs skip building the text altogether
         werewolves = self.get_werewolves()
         villagers = self.get_villagers()
-        print(f"\n=== Round {self.round} Summary ===")
-        print(f"Werewolves alive: {len(werewolves)} ({', '.join([p.name for p in werewolves])})")
-        print(f"Villagers alive: {len(villagers)} ({', '.join([p.name for p in villagers])})")
-        print("================================\n")
+        self.report(
+            f"\n=== Round {self.round} Summary ===\n"
+            f"Werewolves alive: {len(werewolves)} ({', '.join([p.name for p in werewolves])})\n"
+            f"Villagers alive: {len(villagers)} ({', '.join([p.name for p in villagers])})\n"
+            "================================\n"
+        )
+
+    def report(self, message: str):
+        """Show a message now if verbose, otherwise keep it for the end-of-game output"""
+        if self.verbose:
+            print(message)
+        else:
+            self._status_lines.append(message)
 
-    def night_phase(self):
+    async def cast_vote(self, prompt: str):
+        """Ask for a vote, then for the reasoning behind it (the second prompt needs the first answer)"""
+        vote = await self.call_api(prompt)
+        
+        # Get the reasoning behind the vote
+        reason_prompt = (
+            f"You just voted for {vote} in the Werewolf game. "
+            f"In 1-2 sentences, explain your strategic reasoning for this vote. "
+            f"Be specific about why this target advances your win condition."
+        )
+        vote_reason = await self.call_api(reason_prompt, max_tokens=75)
+        return vote, vote_reason
+
+    async def night_phase(self):
         self.round += 1
-        self.metrics["rounds_played"] = self.round
-        self.logger.log_event("night_start", {"round": self.round})
+        self._record("night_start", {"round": self.round})
         alive_players = self.get_alive_players()
-        player_names = [p.name for p in alive_players]
-        game_stage = "early" if self.round <= 2 else "mid" if self.round <= 4 else "late"
+        player_names = self.get_alive_names()
+        game_stage = self.get_game_stage()
+        game_summary = self.get_summarized_history()  # Shared by all night prompts
+        by_name = {p.name: p for p in self.players}
+        alive_by_name = {p.name: p for p in alive_players}
 
         # Update player activity levels
         for player in alive_players:
-            # Extract discussions from the logger's discussion entries
-            discussions_data = []
-            for disc in self.logger.discussions:
-                if "data" in disc and "discussions" in disc["data"]:
-                    discussions_data.extend(disc["data"]["discussions"])
-            
-            player.activity_level = self.analyze_player_activity(player, discussions_data)
+            player.activity_level = self.analyze_player_activity(player)
 
-        # Werewolf selection with enhanced strategic targeting
+        # Build every night prompt first: the werewolf, seer and medic choices are
+        # independent, so their API calls are sent concurrently and resolved below
         werewolves = self.get_werewolves()
+        werewolf_prompt = seer_prompt = medic_prompt = None
         if werewolves:
-            werewolf_names = [p.name for p in werewolves]
-            key_targets = self.identify_key_targets("Werewolf")
+            werewolf_names = self.get_werewolf_names()
+            wolf_key_targets = self.identify_key_targets("Werewolf")
             
             # Format targets for the prompt
             target_info = "\n".join([f"- {name}: {'High priority' if score >= 0.8 else 'Medium priority' if score >= 0.6 else 'Low priority'}" 
-                                   for name, score in key_targets])
+                                   for name, score in wolf_key_targets])
             
             # Enhanced werewolf prompt with strategic guidance and target analysis
-            prompt = (
+            werewolf_prompt = (
                 f"In the fictional Werewolf game, you are a Werewolf. Your team: {werewolf_names}. "
                 f"Alive players: {player_names}.\n"
-                f"Game history summary: {self.get_summarized_history()}\n"
+                f"Game history summary: {game_summary}\n"
                 f"Game stage: {game_stage} game (Round {self.round})\n"
                 f"Target analysis:\n{target_info}\n"
                 f"Strategic considerations:\n"
@@ -642,67 +979,63 @@ class WerewolfGame:
                 f"- In late game, prioritize eliminating confirmed villagers\n"
                 f"Select one player as the target for this round. Respond with only the player's name."
             )
-            victim_name = self.call_api(prompt)
-            victim = next((p for p in alive_players if p.name == victim_name), None)
-            if not victim or victim.role == "Werewolf":  # Ensure werewolves don't kill their own
-                # Find the highest priority non-werewolf target
-                valid_targets = [(name, score) for name, score in key_targets 
-                               if next((p for p in alive_players if p.name == name), None) and 
-                               next((p for p in alive_players if p.name == name), None).role != "Werewolf"]
-                if valid_targets:
-                    valid_targets.sort(key=lambda x: x[1], reverse=True)  # Sort by priority
-                    victim = next((p for p in alive_players if p.name == valid_targets[0][0]), None)
-                else:
-                    village_targets = [p for p in alive_players if p.role != "Werewolf"]
-                    if village_targets:
-                        victim = random.choice(village_targets)  # Fallback
-                    else:
-                        victim = None
-            if victim:
-                self.logger.log_event("werewolf_choice", {"victim": victim.name, "reasoning": prompt})
-        else:
-            victim = None
 
         # Seer investigation with enhanced strategic targeting
         seer = next((p for p in alive_players if p.role == "Seer"), None)
         if seer:
-            valid_targets = [p for p in alive_players if p.name != seer.name]  # Exclude self
-            valid_names = [p.name for p in valid_targets]
+            seer_targets = [p for p in alive_players if p.name != seer.name]  # Exclude self
+            seer_targets_by_name = {p.name: p for p in seer_targets}
+            valid_names = [p.name for p in seer_targets]
             
             # Already investigated players
-            investigated = [name for name, _ in seer.knowledge]
-            uninvestigated = [p.name for p in valid_targets if p.name not in investigated]
+            investigated = [name for name, _ in seer.investigations]
+            uninvestigated = [p.name for p in seer_targets if p.name not in investigated]
+            
+            # Who has been suspected, and by whom: built in one pass over the statements so
+            # the defence check below is a set lookup rather than a rescan of everyone's statements.
+            # The same pass (one lower() per statement) collects each player's defensive statements.
+            suspected_by = {}
+            defences = {}
+            for p in seer_targets:
+                for stmt in p.statements:
+                    stmt_lower = stmt.lower()
+                    if "suspect" in stmt_lower:
+                        for other in seer_targets:
+                            if other.name in stmt:
+                                suspected_by.setdefault(other.name, set()).add(p.name)
+                    if "defend" in stmt_lower:
+                        defences.setdefault(p.name, []).append(stmt)
             
             # Analyze player behavior to prioritize suspicious players
             suspicious_players = []
-            for player in valid_targets:
+            for player in seer_targets:
                 if player.name not in investigated:
                     suspicion_score = 0
                     # Suspicious behavior: defending suspected players, inconsistent statements, voting patterns
-                    for stmt in player.statements:
-                        # Check for defensive statements of suspected players
-                        for other in valid_targets:
-                            if other.name in stmt and "defend" in stmt.lower() and any(other.name in s and "suspect" in s for s in [p.statements for p in valid_targets if p != player and p != other]):
+                    for stmt in defences.get(player.name, ()):
+                        # Check for defensive statements of players suspected by someone else
+                        for other in seer_targets:
+                            if other.name in stmt and suspected_by.get(other.name, set()) - {player.name, other.name}:
                                 suspicion_score += 0.2
                     
                     # Check voting patterns
                     if player.votes:
                         for vote in player.votes:
-                            voted_player = next((p for p in self.players if p.name == vote), None)
+                            voted_player = by_name.get(vote)
                             if voted_player and voted_player.role != "Werewolf":
                                 suspicion_score += 0.1  # Suspicious if consistently voting against villagers
                     
                     if suspicion_score > 0:
                         suspicious_players.append((player.name, suspicion_score))
             
-            suspicious_players.sort(key=lambda x: x[1], reverse=True)
+            suspicious_players = heapq.nlargest(3, suspicious_players, key=itemgetter(1))  # Only the top 3 are used
             
             if valid_names:
                 # Enhanced seer prompt with strategic guidance and suspicion analysis
-                prompt = (
+                seer_prompt = (
                     f"In the fictional Werewolf game, you are the Seer. Alive players (excluding yourself): {valid_names}.\n"
-                    f"Game history summary: {self.get_summarized_history()}\n"
-                    f"Your previous investigations: {seer.knowledge}\n"
+                    f"Game history summary: {game_summary}\n"
+                    f"Your previous investigations: {seer.investigations}\n"
                     f"Players you haven't investigated yet: {uninvestigated}\n"
                     f"Suspicious players based on behavior:\n"
                     f"{', '.join([name for name, _ in suspicious_players[:3]]) if suspicious_players else 'None identified'}\n"
@@ -713,38 +1046,23 @@ class WerewolfGame:
                     f"- Balance between checking new players and verifying suspicions\n"
                     f"Select one player to investigate their role. Respond with only the player's name."
                 )
-                target_name = self.call_api(prompt)
-                target = next((p for p in valid_targets if p.name == target_name), None)
-                if not target:
-                    # Prioritize uninvestigated players if available
-                    if uninvestigated:
-                        target = next((p for p in valid_targets if p.name in uninvestigated), None)
-                    elif suspicious_players:
-                        target = next((p for p in valid_targets if p.name == suspicious_players[0][0]), None)
-                    else:
-                        target = random.choice(valid_targets)  # Fallback
-                result = "Werewolf" if target.role == "Werewolf" else "Not a Werewolf"
-                seer.knowledge.append((target.name, result))
-                self.metrics["total_seer_investigations"] += 1
-                self.logger.log_event("seer_investigation", {"seer": seer.name, "target": target.name, "result": result, "reasoning": prompt})
-            else:
-                self.logger.log_event("seer_investigation", {"seer": seer.name, "error": "No valid targets"})
 
         # Medic protection with enhanced strategic targeting
         medic = next((p for p in alive_players if p.role == "Medic"), None)
         if medic:
-            key_targets = self.identify_key_targets("Medic")
-            valid_targets = [p for p in alive_players if p.name != medic.last_protected]
-            valid_names = [p.name for p in valid_targets]
+            medic_key_targets = self.identify_key_targets("Medic")
+            medic_targets = [p for p in alive_players if p.name != medic.last_protected]
+            medic_names = [p.name for p in medic_targets]
+            medic_targets_by_name = {p.name: p for p in medic_targets}
             
             # Format targets for the prompt
             target_info = "\n".join([f"- {name}: {'High priority' if score >= 0.8 else 'Medium priority' if score >= 0.6 else 'Low priority'}" 
-                                   for name, score in key_targets if name in valid_names])
+                                   for name, score in medic_key_targets if name in medic_names])
             
             # Enhanced medic prompt with strategic guidance and target analysis
-            prompt = (
-                f"In the fictional Werewolf game, you are the Medic. Alive players: {valid_names}.\n"
-                f"Game history summary: {self.get_summarized_history()}\n"
+            medic_prompt = (
+                f"In the fictional Werewolf game, you are the Medic. Alive players: {medic_names}.\n"
+                f"Game history summary: {game_summary}\n"
                 f"You cannot protect {medic.last_protected or 'none'} again this round.\n"
                 f"Game stage: {game_stage} game (Round {self.round})\n"
                 f"Target analysis:\n{target_info}\n"
@@ -755,20 +1073,69 @@ class WerewolfGame:
                 f"- Consider self-protection if you're at risk\n"
                 f"Select one player to protect this round. Respond with only the player's name."
             )
-            protected_name = self.call_api(prompt)
-            protected = next((p for p in valid_targets if p.name == protected_name), None)
+
+        # Each living werewolf gets its own sampled pick (n=len(werewolves), one request);
+        # the pack goes with the most common answer
+        pack_votes, target_name, protected_name = await asyncio.gather(
+            self.call_api_samples(werewolf_prompt, len(werewolves)) if werewolf_prompt else self._no_call(),
+            self.call_api(seer_prompt) if seer_prompt else self._no_call(),
+            self.call_api(medic_prompt) if medic_prompt else self._no_call()
+        )
+
+        # Werewolf selection
+        if werewolves:
+            victim_name = Counter(pack_votes).most_common(1)[0][0]
+            victim = alive_by_name.get(victim_name)
+            if not victim or victim.role == "Werewolf":  # Ensure werewolves don't kill their own
+                # Find the highest priority non-werewolf target
+                valid_targets = [(name, score) for name, score in wolf_key_targets 
+                               if name in alive_by_name and alive_by_name[name].role != "Werewolf"]
+                if valid_targets:
+                    victim = alive_by_name[max(valid_targets, key=itemgetter(1))[0]]  # Highest priority
+                else:
+                    village_targets = [p for p in alive_players if p.role != "Werewolf"]
+                    if village_targets:
+                        victim = self.rng.choice(village_targets)  # Fallback
+                    else:
+                        victim = None
+            if victim:
+                self.logger.log_event("werewolf_choice", {"victim": victim.name, "pack_votes": pack_votes, "reasoning": werewolf_prompt})
+        else:
+            victim = None
+
+        # Seer investigation
+        if seer:
+            if seer_prompt:
+                target = seer_targets_by_name.get(target_name)
+                if not target:
+                    # Prioritize uninvestigated players if available
+                    if uninvestigated:
+                        target = seer_targets_by_name[uninvestigated[0]]
+                    elif suspicious_players:
+                        target = seer_targets_by_name[suspicious_players[0][0]]
+                    else:
+                        target = self.rng.choice(seer_targets)  # Fallback
+                result = "Werewolf" if target.role == "Werewolf" else "Not a Werewolf"
+                seer.investigations.append((target.name, result))
+                seer.knowledge_version += 1
+                self._record("seer_investigation", {"seer": seer.name, "target": target.name, "result": result, "reasoning": seer_prompt})
+            else:
+                self._record("seer_investigation", {"seer": seer.name, "error": "No valid targets"})
+
+        # Medic protection
+        if medic:
+            protected = medic_targets_by_name.get(protected_name)
             if not protected:
                 # Select from high priority targets first
-                high_priority = [(name, score) for name, score in key_targets if score >= 0.8 and name in valid_names]
-                if high_priority:
-                    protected_name = high_priority[0][0]
-                    protected = next((p for p in valid_targets if p.name == protected_name), None)
+                protected_name = next((name for name, score in medic_key_targets if score >= 0.8 and name in medic_targets_by_name), None)
+                if protected_name:
+                    protected = medic_targets_by_name[protected_name]
                 else:
-                    protected = random.choice(valid_targets)  # Fallback
+                    protected = self.rng.choice(medic_targets)  # Fallback
             
             if protected:
                 medic.last_protected = protected.name
-                self.logger.log_event("medic_protection", {"medic": medic.name, "protected": protected.name, "reasoning": prompt})
+                self.logger.log_event("medic_protection", {"medic": medic.name, "protected": protected.name, "reasoning": medic_prompt})
             else:
                 protected = None
         else:
@@ -776,12 +1143,11 @@ class WerewolfGame:
 
         # Resolve night actions and update game history
         if victim and protected and victim.name == protected.name:
-            self.logger.log_event("night_result", {"victim": victim.name, "saved": True})
+            self._record("night_result", {"victim": victim.name, "saved": True})
             self.game_history.append(f"Night {self.round}: No one was killed (Medic saved someone)")
-            self.metrics["medic_successful_protections"] += 1
         elif victim:
-            victim.is_alive = False
-            self.logger.log_event("night_result", {"victim": victim.name, "saved": False})
+            self._kill(victim)
+            self._record("night_result", {"victim": victim.name, "saved": False})
             self.game_history.append(f"Night {self.round}: {victim.name} was killed")
         else:
             self.game_history.append(f"Night {self.round}: No one was killed")
@@ -789,12 +1155,19 @@ class WerewolfGame:
         # Print round summary after night phase
         self.print_round_summary()
 
-    def day_phase(self):
+    async def day_phase(self):
         self.logger.log_event("day_start", {"round": self.round})
-        alive_players = self.get_alive_players()
-        player_names = [p.name for p in alive_players]
+        alive_players = list(self.get_alive_players())  # Copy: shuffled for speaking order below
+        player_names = self.get_alive_names()
         game_summary = self.get_summarized_history()
-        game_stage = "early" if self.round <= 2 else "mid" if self.round <= 4 else "late"
+        game_stage = self.get_game_stage()
+        alive_by_name = {p.name: p for p in alive_players}
+        # Nobody dies during discussion, so one name scanner serves every statement today
+        names_re = name_pattern(player_names)
+        villager_names = {p.name for p in self.get_villagers()}
+        # Teams are fixed until the vote is resolved, so each werewolf's teammate list is built once
+        werewolves = self.get_werewolves()
+        teammates_by_wolf = {w.name: ', '.join([p.name for p in werewolves if p is not w]) for w in werewolves}
         all_discussions = []
         all_prompts = []
 
@@ -808,7 +1181,19 @@ class WerewolfGame:
             # Get voting history summary
             voting_history = self.format_voting_history()
             
-            random.shuffle(alive_players)  # Randomize speaking order
+            # Everything shared by the speakers of this discussion round leads the prompt, so it is
+            # built once and stays a common prefix for the provider's prompt caching
+            round_prefix = (
+                f"In the fictional Werewolf game, it is the day discussion.\n"
+                f"Game summary: {game_summary}\n"
+                f"Alive players: {', '.join(player_names)}\n"
+                f"Game stage: {game_stage} game (Round {self.round})\n"
+                f"Discussion round {discussion_round} of {self.discussion_rounds}\n"
+                f"Previous discussion rounds summary: {previous_statements_summary}\n"
+                f"Voting history: {voting_history}\n"
+            )
+            
+            self.rng.shuffle(alive_players)  # Randomize speaking order
             for player in alive_players:
                 # Get a concise summary of previous statements in this round
                 current_round_statements = "\n".join([f"{p['player']}: {p['statement']}" for p in discussion]) if discussion else "No statements yet."
@@ -816,132 +1201,95 @@ class WerewolfGame:
                 # Get player-specific knowledge in a more structured format
                 knowledge_str = self.format_player_knowledge(player)
                 
-                # Create role-specific strategic guidance
-                strategy_guidance = self.get_role_strategy(player, discussion_round)
-                
-                # Adjust role information based on role and game state
+                # Role-specific strategic guidance (prebuilt per role and stage) and role information
+                strategy_guidance = DISCUSSION_GUIDANCE[(player.role, game_stage)]
                 if player.role == "Werewolf":
-                    werewolves = self.get_werewolves()
-                    teammates = [p.name for p in werewolves if p != player]
-                    role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
-                    
-                    # Enhanced werewolf discussion strategy for late game
-                    if game_stage == "late":
-                        coordination_hint = (
-                            f"In this late stage, coordinate subtly with your teammates. "
-                            f"Focus on discrediting players who might be the Seer or Medic. "
-                            f"If there's a consensus building against a villager, support it to blend in."
-                        )
-                        strategy_guidance += f"\n{coordination_hint}"
+                    role_info = f"You are a Werewolf. Your teammates are {teammates_by_wolf[player.name]}."
                 elif player.role == "Seer":
                     role_info = f"You are the Seer. Your investigations: {knowledge_str}."
-                    
                     # Adjusted Seer strategy based on findings and game stage
-                    werewolf_found = any(result == "Werewolf" for _, result in player.knowledge)
-                    if werewolf_found and game_stage != "early":
-                        reveal_hint = (
-                            f"You have found a werewolf. Consider revealing your role strategically "
-                            f"to convince others. In late game, this information is crucial for the village."
-                        )
-                        strategy_guidance += f"\n{reveal_hint}"
+                    if game_stage != "early" and any(result == "Werewolf" for _, result in player.investigations):
+                        strategy_guidance = SEER_REVEAL_GUIDANCE[game_stage]
                 elif player.role == "Medic":
                     role_info = f"You are the Medic."
-                    
                     # Keep track of who you've protected
                     if player.last_protected:
                         role_info += f" Last night you protected {player.last_protected}."
-                    
-                    # Medic strategy adjustment
-                    if game_stage == "late":
-                        medic_hint = (
-                            f"In late game, your survival is critical. Be careful about revealing your role, "
-                            f"but focus on identifying werewolves through voting patterns and behavior."
-                        )
-                        strategy_guidance += f"\n{medic_hint}"
                 else:
                     role_info = f"You are a {player.role}."
-                    
-                    # Villager strategy adjustment for late game
-                    if game_stage == "late":
-                        villager_hint = (
-                            f"In late game, be suspicious of quiet players who haven't contributed meaningfully. "
-                            f"Look for voting patterns that suggest werewolf coordination."
-                        )
-                        strategy_guidance += f"\n{villager_hint}"
-
-                prompt = (
-                    f"In the fictional Werewolf game, {role_info}\n"
-                    f"Game summary: {game_summary}\n"
-                    f"Alive players: {', '.join(player_names)}\n"
-                    f"Game stage: {game_stage} game (Round {self.round})\n"
-                    f"Discussion round {discussion_round} of {self.discussion_rounds}\n"
-                    f"Previous discussion rounds summary: {previous_statements_summary}\n"
+
+                # Current round statements only grow between speakers, so they come next,
+                # followed by the parts specific to this player
+                prompt = round_prefix + (
                     f"Current round statements: {current_round_statements}\n"
+                    f"{role_info}\n"
                     f"Your knowledge: {knowledge_str}\n"
-                    f"Voting history: {voting_history}\n"
                     f"Strategic guidance: {strategy_guidance}\n"
                     f"Now, as {player.name}, make a strategic statement about who you suspect or defend. "
                     f"Your statement should directly advance your win condition while appearing logical to others. "
                     f"Be specific with your reasoning and avoid vague statements. "
                     f"Respond with only your in-character statement (1-2 sentences)."
                 )
-                statement = self.call_api(prompt, max_tokens=100)  # Increased token limit for more substantive statements
+                statement = await self.call_api(prompt, max_tokens=100)  # Increased token limit for more substantive statements
                 discussion.append({"player": player.name, "statement": statement})
                 prompts.append({"player": player.name, "prompt": prompt})
                 player.statements.append(f"Round {discussion_round}: {statement}")
+                word_count = len(statement.split())
+                if word_count > 3:  # Consider meaningful if more than 3 words
+                    player.activity_statement_count += 1
+                    player.activity_word_count += word_count
                 self.metrics["total_discussion_statements"] += 1
                 
                 # Analyze statement for role claims
-                if "I am the Seer" in statement or "as the Seer" in statement:
-                    player.role_claims.append(("Seer", self.round, discussion_round))
-                    self.confirmed_roles[player.name] = "Claimed Seer"
-                elif "I am the Medic" in statement or "as the Medic" in statement:
-                    player.role_claims.append(("Medic", self.round, discussion_round))
-                    self.confirmed_roles[player.name] = "Claimed Medic"
+                claim = claimed_role(statement)
+                if claim:
+                    player.role_claims.append((claim, self.round, discussion_round))
+                    self.confirmed_roles[player.name] = f"Claimed {claim}"
 
-                # Check for Seer reveal
-                if player.role == "Seer" and "I am the Seer" in statement:
-                    self.metrics["seer_reveals"] += 1
+                    # Check for Seer reveal
+                    if player.role == "Seer" and claim == "Seer":
+                        self.metrics["seer_reveals"] += 1
+
+                # One scan each for the player names and the keywords in the statement
+                mentioned = set(names_re.findall(statement))
+                mentioned.discard(player.name)
+                cues = statement_cues(statement)
 
                 # Check for Werewolf deception
-                if player.role == "Werewolf" and any(p.name in statement for p in self.get_villagers()):
+                if player.role == "Werewolf" and not villager_names.isdisjoint(mentioned):
                     self.metrics["werewolf_deceptions"] += 1
 
-                # Update suspicions based on statement
+                # Update suspicions based on statement (the keyword checks don't depend on
+                # the mentioned player, so they are made once per statement)
+                if "accusation" in cues:
+                    keyword_change = 0.25  # Increased suspicion for direct accusations
+                elif "defense" in cues:
+                    keyword_change = -0.2  # Decreased suspicion for defense
+                else:
+                    keyword_change = 0
                 for p in alive_players:
-                    if p.name != player.name and p.name in statement:
-                        existing_suspicion = next((level for name, level in player.knowledge if name == p.name and isinstance(level, float)), 0.0)
+                    if p.name in mentioned:
+                        existing_suspicion = player.suspicions.get(p.name, 0.0)
                         
                         # Enhanced suspicion modeling
-                        suspicion_change = 0
-                        if "suspect" in statement.lower() or "accuse" in statement.lower():
-                            if p.name in statement.lower():
-                                suspicion_change = 0.25  # Increased suspicion for direct accusations
-                        elif "innocent" in statement.lower() or "defend" in statement.lower():
-                            if p.name in statement.lower():
-                                suspicion_change = -0.2  # Decreased suspicion for defense
+                        suspicion_change = keyword_change
                         
                         # Adjust based on role claims and confirmed information
-                        if player.role == "Seer" and any(p.name in res and res[1] == "Werewolf" for res in player.knowledge):
+                        if player.role == "Seer" and (p.name, "Werewolf") in player.investigations:
                             suspicion_change = 0.5  # Significant increase for Seer accusation
                             
                         new_suspicion = max(0.0, min(1.0, existing_suspicion + suspicion_change))
                         
                         if existing_suspicion != new_suspicion:
-                            player.knowledge = [(name, level) for name, level in player.knowledge if name != p.name]
-                            player.knowledge.append((p.name, new_suspicion))
+                            player.suspicions[p.name] = new_suspicion
+                            player.knowledge_version += 1
                             player.suspicion_changes.append({"round": self.round, "discussion_round": discussion_round, "target": p.name, "new_suspicion": new_suspicion})
                             self.metrics["suspicion_changes"] += 1
 
                 # Track statement variety
-                current_targets = [p.name for p in alive_players if p.name in statement and p.name != player.name]
-                past_targets = []
-                for past_stmt in player.statements[:-1]:
-                    for p in alive_players:
-                        if p.name in past_stmt and p.name != player.name:
-                            past_targets.append(p.name)
-                if current_targets and all(target not in past_targets for target in current_targets):
+                if mentioned and player.past_target_set.isdisjoint(mentioned):
                     self.metrics["statement_variety"] += 1
+                player.past_target_set.update(mentioned)
 
             all_discussions.append({"discussion_round": discussion_round, "statements": discussion})
             all_prompts.append({"discussion_round": discussion_round, "prompts": prompts})
@@ -950,9 +1298,25 @@ class WerewolfGame:
         self.logger.log_discussion("discussion", {"discussions": all_discussions})
         self.logger.log_prompts("discussion", {"prompts": all_prompts})
 
-        # Voting with enhanced prompts and strategy
-        votes = {}
-        vote_reasons = {}
+        # Voting with enhanced prompts and strategy. Ballot prompts only depend on the
+        # finished discussion, so they are built first and all voters are polled concurrently.
+        # Everything below up to the loop is the same for every voter, so it is computed once
+        discussion_summary = self.extract_key_accusations(all_discussions)  # Key accusations and defenses
+        voting_context = self.format_voting_history()
+        role_claims = ', '.join([f'{name}: {role}' for name, role in self.confirmed_roles.items()])
+        # The shared context leads every ballot, built once (and a common prefix for prompt caching)
+        ballot_prefix = (
+            f"In the fictional Werewolf game, it is time to vote.\n"
+            f"Game summary: {game_summary}\n"
+            f"Game stage: {game_stage} game (Round {self.round})\n"
+            f"Key accusations and defenses from discussions:\n{discussion_summary}\n"
+            f"Voting history: {voting_context}\n"
+            f"Role claims in the game: {role_claims}\n"
+        )
+        # Late-game werewolf teams look for a village consensus target to join
+        village_consensus = self._compute_village_consensus(alive_players) if game_stage == "late" and len(werewolves) > 1 else None
+
+        ballots = []
         for player in alive_players:
             valid_targets = [p.name for p in alive_players if p.name != player.name]  # Exclude self
             knowledge_str = self.format_player_knowledge(player)
@@ -960,50 +1324,24 @@ class WerewolfGame:
             # Create role-specific voting strategy
             voting_strategy = self.get_voting_strategy(player)
             
-            # Create a discussion summary focused on key accusations
-            discussion_summary = self.extract_key_accusations(all_discussions)
-            
-            # Enhanced voting context
-            voting_context = self.format_voting_history()
-            
             # Adjust role information based on role and game state
             if player.role == "Werewolf":
-                werewolves = self.get_werewolves()
-                teammates = [p.name for p in werewolves if p != player]
+                teammates = teammates_by_wolf[player.name]
                 
-                # Check if werewolves should coordinate votes in late game
-                if game_stage == "late" and len(werewolves) > 1:
-                    # Look for a consensus village target
-                    village_consensus = None
-                    villager_accusations = {}
-                    for p in self.get_villagers():
-                        for stmt in p.statements:
-                            for other in alive_players:
-                                if other.name in stmt and "suspect" in stmt.lower() and other.role != "Werewolf":
-                                    villager_accusations[other.name] = villager_accusations.get(other.name, 0) + 1
-                    
-                    if villager_accusations:
-                        # Find the most accused villager
-                        village_consensus = max(villager_accusations.items(), key=lambda x: x[1])[0]
-                        
-                        # If there's a strong consensus, werewolves should join it to blend in
-                        if villager_accusations[village_consensus] >= len(self.get_villagers()) / 2:
-                            role_info = (
-                                f"You are a Werewolf. Your teammates are {', '.join(teammates)}. "
-                                f"IMPORTANT: The village seems to be forming a consensus against {village_consensus}. "
-                                f"Consider voting with this consensus to blend in, unless another werewolf is at risk."
-                            )
-                            self.metrics["werewolf_team_coordination"] += 1
-                        else:
-                            role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
-                    else:
-                        role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
+                # If there's a strong consensus, werewolves should join it to blend in
+                if village_consensus:
+                    role_info = (
+                        f"You are a Werewolf. Your teammates are {teammates}. "
+                        f"IMPORTANT: The village seems to be forming a consensus against {village_consensus}. "
+                        f"Consider voting with this consensus to blend in, unless another werewolf is at risk."
+                    )
+                    self.metrics["werewolf_team_coordination"] += 1
                 else:
-                    role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
+                    role_info = f"You are a Werewolf. Your teammates are {teammates}."
             elif player.role == "Seer":
-                werewolf_found = any(result == "Werewolf" for _, result in player.knowledge)
+                werewolf_found = any(result == "Werewolf" for _, result in player.investigations)
                 if werewolf_found:
-                    werewolf_names = [name for name, result in player.knowledge if result == "Werewolf"]
+                    werewolf_names = [name for name, result in player.investigations if result == "Werewolf"]
                     role_info = (
                         f"You are the Seer. Your investigations have identified these werewolves: {', '.join(werewolf_names)}. "
                         f"Your vote should prioritize eliminating a confirmed werewolf."
@@ -1014,29 +1352,20 @@ class WerewolfGame:
                 role_info = f"You are a {player.role}."
 
             # Enhanced voting prompt with strategic guidance
-            prompt = (
-                f"In the fictional Werewolf game, {role_info}\n"
-                f"Game summary: {game_summary}\n"
-                f"Game stage: {game_stage} game (Round {self.round})\n"
+            prompt = ballot_prefix + (
+                f"{role_info}\n"
                 f"Alive players (excluding yourself): {', '.join(valid_targets)}\n"
-                f"Key accusations and defenses from discussions:\n{discussion_summary}\n"
                 f"Your knowledge: {knowledge_str}\n"
-                f"Voting history: {voting_context}\n"
-                f"Role claims in the game: {', '.join([f'{name}: {role}' for name, role in self.confirmed_roles.items()])}\n"
                 f"Voting strategy: {voting_strategy}\n"
                 f"Based on all information, vote for one player to eliminate, "
                 f"or respond with 'Pass' if you truly cannot decide. Respond with only the player's name or 'Pass'."
             )
-            vote = self.call_api(prompt)
-            
-            # Get the reasoning behind the vote
-            reason_prompt = (
-                f"You just voted for {vote} in the Werewolf game. "
-                f"In 1-2 sentences, explain your strategic reasoning for this vote. "
-                f"Be specific about why this target advances your win condition."
-            )
-            vote_reason = self.call_api(reason_prompt, max_tokens=75)
-            
+            ballots.append((player, valid_targets, prompt))
+
+        results = await asyncio.gather(*(self.cast_vote(prompt) for _, _, prompt in ballots))
+        votes = {}
+        vote_reasons = {}
+        for (player, valid_targets, prompt), (vote, vote_reason) in zip(ballots, results):
             if vote == "Pass" or vote not in valid_targets:
                 votes[player.name] = "Pass"
                 vote_reasons[player.name] = vote_reason
@@ -1046,12 +1375,11 @@ class WerewolfGame:
                 player.votes.append(vote)
                 
                 # Update player being voted for
-                voted_player = next((p for p in alive_players if p.name == vote), None)
-                if voted_player:
-                    voted_player.voted_for.append(player.name)
+                voted_player = alive_by_name[vote]
+                voted_player.voted_for.append(player.name)
                 
                 self.metrics["total_votes"] += 1
-                if next(p for p in alive_players if p.name == vote).role == "Werewolf":
+                if voted_player.role == "Werewolf":
                     self.metrics["votes_against_werewolves"] += 1
                 
                 # Check if vote aligns with discussion
@@ -1060,8 +1388,8 @@ class WerewolfGame:
                     self.metrics["vote_discussion_alignment"] += 1
                 
                 # Check for werewolf team coordination
-                if player.role == "Werewolf" and len(self.get_werewolves()) > 1:
-                    other_werewolf_votes = [votes.get(w.name) for w in self.get_werewolves() if w.name != player.name and w.name in votes]
+                if player.role == "Werewolf" and len(werewolves) > 1:
+                    other_werewolf_votes = [votes[w.name] for w in werewolves if w.name != player.name and w.name in votes]
                     if other_werewolf_votes and all(v == vote for v in other_werewolf_votes):
                         self.metrics["werewolf_team_coordination"] += 1
             
@@ -1069,26 +1397,29 @@ class WerewolfGame:
 
         self.logger.log_event("votes", votes)
         self.voting_history.append({"round": self.round, "votes": votes, "reasons": vote_reasons})
+        self._vote_history_version += 1
         self.logger.log_votes(self.round, votes)
 
         # Tally votes and track consensus
-        vote_counts = {}
-        for vote in votes.values():
-            if vote != "Pass":
-                vote_counts[vote] = vote_counts.get(vote, 0) + 1
+        vote_counts = Counter(vote for vote in votes.values() if vote != "Pass")
+        # Top count and everyone tied on it, in one pass
+        max_votes, eliminated_candidates = 0, []
+        for name, count in vote_counts.items():
+            if count > max_votes:
+                max_votes, eliminated_candidates = count, [name]
+            elif count == max_votes:
+                eliminated_candidates.append(name)
                 
         # Calculate village consensus rate
         if vote_counts:
-            max_votes = max(vote_counts.values())
             consensus_level = max_votes / len(alive_players)
             self.metrics["village_consensus_rate"] += consensus_level
             
             # Find player with most votes (randomly select if tied)
-            eliminated_candidates = [name for name, count in vote_counts.items() if count == max_votes]
-            eliminated_name = random.choice(eliminated_candidates)
-            eliminated = next((p for p in alive_players if p.name == eliminated_name), None)
+            eliminated_name = self.rng.choice(eliminated_candidates)
+            eliminated = alive_by_name.get(eliminated_name)
             if eliminated:
-                eliminated.is_alive = False
+                self._kill(eliminated)
                 self.logger.log_event("elimination", {"eliminated": eliminated.name, "votes_received": max_votes, "total_voters": len(alive_players)})
                 self.game_history.append(f"Day {self.round}: {eliminated.name} was eliminated with {max_votes} votes out of {len(alive_players)} voters")
                 
@@ -1097,66 +1428,135 @@ class WerewolfGame:
                     seer = next((p for p in alive_players if p.role == "Seer"), None)
                     if seer and votes.get(seer.name) == eliminated_name:
                         self.metrics["seer_correct_accusations"] += 1
+        else:
+            self.logger.log_event("elimination", {"eliminated": None, "votes_received": 0, "total_voters": len(alive_players)})
         
         # Print round summary after day phase
         self.print_round_summary()
 
+    def _compute_village_consensus(self, alive_players) -> Optional[str]:
+        """Return the non-werewolf most accused by villagers, if the accusations amount to a consensus"""
+        villager_accusations = Counter()
+        villagers = self.get_villagers()
+        for p in villagers:
+            for stmt in p.statements:
+                if "suspect" not in stmt.lower():
+                    continue
+                for other in alive_players:
+                    if other.name in stmt and other.role != "Werewolf":
+                        villager_accusations[other.name] += 1
+        if not villager_accusations:
+            return None
+        most_accused, count = max(villager_accusations.items(), key=lambda x: x[1])
+        return most_accused if count >= len(villagers) / 2 else None
+
+    def snapshot_metrics(self, phase: str):
+        """Log the metrics that changed since the previous snapshot, so a killed game still leaves them on disk"""
+        changed = {k: v for k, v in self.metrics.items() if self._metrics_logged[k] != v}
+        if changed:
+            self.logger.log_metrics_snapshot(phase, self.round, changed)
+            self._metrics_logged.update(changed)
+
     def save_metrics(self):
-        """Save detailed game metrics"""
+        """Save detailed game metrics (once, from _finalize; per-phase progress goes to the snapshots file)"""
+        m = self.metrics
         metrics_summary = {
             "game_id": self.game_id,
-            "rounds_played": self.metrics["rounds_played"],
-            "winner": self.metrics["winner"],
+            "rounds_played": m["rounds_played"],
+            "winner": m["winner"],
             "seer_performance": {
-                "seer_accuracy": (self.metrics["seer_correct_accusations"] / self.metrics["total_seer_investigations"]
-                                if self.metrics["total_seer_investigations"] > 0 else 0),
-                "seer_reveal_rate": self.metrics["seer_reveals"] / self.metrics["rounds_played"] if self.metrics["rounds_played"] > 0 else 0,
-                "total_investigations": self.metrics["total_seer_investigations"],
+                "seer_accuracy": _ratio(m["seer_correct_accusations"], m["total_seer_investigations"]),
+                "seer_reveal_rate": _ratio(m["seer_reveals"], m["rounds_played"]),
+                "total_investigations": m["total_seer_investigations"],
             },
             "werewolf_performance": {
-                "deception_rate": self.metrics["werewolf_deceptions"] / self.metrics["total_discussion_statements"] if self.metrics["total_discussion_statements"] > 0 else 0,
-                "team_coordination": self.metrics["werewolf_team_coordination"] / self.metrics["rounds_played"] if self.metrics["rounds_played"] > 0 else 0,
+                "deception_rate": _ratio(m["werewolf_deceptions"], m["total_discussion_statements"]),
+                "team_coordination": _ratio(m["werewolf_team_coordination"], m["rounds_played"]),
             },
             "medic_performance": {
-                "successful_protections": self.metrics["medic_successful_protections"],
+                "successful_protections": m["medic_successful_protections"],
             },
             "village_performance": {
-                "voting_accuracy": (self.metrics["votes_against_werewolves"] / self.metrics["total_votes"]
-                                   if self.metrics["total_votes"] > 0 else 0),
-                "consensus_rate": self.metrics["village_consensus_rate"] / self.metrics["rounds_played"] if self.metrics["rounds_played"] > 0 else 0,
+                "voting_accuracy": _ratio(m["votes_against_werewolves"], m["total_votes"]),
+                "consensus_rate": _ratio(m["village_consensus_rate"], m["rounds_played"]),
             },
             "discussion_metrics": {
-                "suspicion_change_rate": self.metrics["suspicion_changes"] / self.metrics["total_discussion_statements"] if self.metrics["total_discussion_statements"] > 0 else 0,
-                "vote_discussion_alignment": self.metrics["vote_discussion_alignment"] / self.metrics["total_votes"] if self.metrics["total_votes"] > 0 else 0,
-                "statement_variety_rate": self.metrics["statement_variety"] / self.metrics["total_discussion_statements"] if self.metrics["total_discussion_statements"] > 0 else 0,
-                "total_statements": self.metrics["total_discussion_statements"],
+                "suspicion_change_rate": _ratio(m["suspicion_changes"], m["total_discussion_statements"]),
+                "vote_discussion_alignment": _ratio(m["vote_discussion_alignment"], m["total_votes"]),
+                "statement_variety_rate": _ratio(m["statement_variety"], m["total_discussion_statements"]),
+                "total_statements": m["total_discussion_statements"],
             }
         }
-        with open(self.logger.metrics_file, 'w') as f:
-            json.dump(metrics_summary, f, indent=2)
+        _write_atomic(self.logger.metrics_file, _dumps_indented(metrics_summary))
 
-    def run(self):
-        self.logger.log_event("game_start", {"players": [(p.name, p.role) for p in self.players]})
-        while True:
-            self.night_phase()
-            print(f"Night phase {self.round} completed...")
-            win_result = self.check_win_condition()
-            if win_result:
-                self.metrics["winner"] = win_result
-                self.logger.log_event("game_end", {"result": win_result})
-                self.save_metrics()
-                break
-            self.day_phase()
-            print(f"Day phase {self.round} completed...")
-            win_result = self.check_win_condition()
-            if win_result:
-                self.metrics["winner"] = win_result
-                self.logger.log_event("game_end", {"result": win_result})
-                self.save_metrics()
-                break
-        print(f"Game Over: {win_result}")
-        print(f"All game logs saved in directory: {self.logger.game_dir}")
+    def _finalize(self, win_result: str):
+        """Record the result and write every end-of-game file, in order: events, metrics, JSON exports"""
+        self._record("game_end", {"result": win_result})
+        self.logger.log_event("api_usage", self.api_usage)
+        self.save_metrics()
+        self.logger.finalize()
+
+    def _checkpoint(self):
+        """Save the game state with the current log sizes; call right after logger.flush()"""
+        state = {field: getattr(self, field) for field in self._CHECKPOINT_FIELDS}
+        state["log_sizes"] = self.logger.file_sizes()
+        _write_atomic(self.logger.checkpoint_file, pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    async def run(self):
+        if self.round == 0:
+            self.logger.log_event("game_start", {"players": self.player_manifest})
+        phases = (("night", self.night_phase), ("day", self.day_phase))
+        # A checkpoint taken just before a crash may already hold a decided game
+        win_result = self.check_win_condition() if self.deaths else None
+        while not win_result:
+            phase_name, phase = phases[self._next_phase]
+            deaths_before = self.deaths
+            await phase()
+            self._next_phase = (self._next_phase + 1) % len(phases)
+            self.snapshot_metrics(phase_name)
+            self.logger.flush()  # Phase boundary: the logs on disk are complete up to here
+            self._checkpoint()
+            if self.verbose:
+                self.report(f"{phase_name.capitalize()} phase {self.round} completed...")
+            if self.deaths != deaths_before:  # Only a death can change the outcome
+                win_result = self.check_win_condition()
+            if not win_result and self._next_phase == 0 and self.round >= self.max_rounds:
+                win_result = "Draw: round limit reached"
+        self._finalize(win_result)
+        os.remove(self.logger.checkpoint_file)  # The finished logs supersede it
+        if self._owns_client:
+            await self.client.close()  # Release the pooled connections; a shared client is closed by its owner
+        self.report("Game Over: %s\nAll game logs saved in directory: %s" % (win_result, self.logger.game_dir))
+        if self._status_lines:
+            sys.stdout.write("\n".join(self._status_lines) + "\n")  # One write for the whole quiet run
+            self._status_lines.clear()
+
+async def main(n_games: int = SETTINGS.n_games, seed: Optional[int] = SETTINGS.seed, resume: Optional[str] = None):
+    """Play n_games in a row on one API client, so its connection pool stays warm between games.
+    With a seed, game k uses seed + k - 1, so a whole run can be repeated.
+    resume is the id of an interrupted game to finish from its checkpoint instead."""
+    client = create_client(SETTINGS.azure_openai, SETTINGS.max_concurrent)
+    started = datetime.now().strftime("%Y%m%d_%H%M%S")
+    try:
+        if resume is not None:
+            game = WerewolfGame(SETTINGS.players, SETTINGS.azure_openai, SETTINGS.discussion_rounds,
+                                max_concurrent=SETTINGS.max_concurrent, verbose=SETTINGS.verbose, client=client,
+                                game_id=resume, resume=True, max_rounds=SETTINGS.max_rounds)
+            await game.run()
+            return
+        for game_number in range(1, n_games + 1):
+            game = WerewolfGame(SETTINGS.players, SETTINGS.azure_openai, SETTINGS.discussion_rounds, randomize_roles=True,
+                                max_concurrent=SETTINGS.max_concurrent, max_rounds=SETTINGS.max_rounds,
+                                verbose=SETTINGS.verbose, client=client, game_id=f"{started}_{game_number}" if n_games > 1 else None,
+                                seed=None if seed is None else seed + game_number - 1)
+            await game.run()
+    finally:
+        await client.close()
 
 if __name__ == "__main__":
-    game = WerewolfGame(CONFIG["players"], CONFIG["azure_openai"], CONFIG["discussion_rounds"], randomize_roles=True)
-    game.run()
\ No newline at end of file
+    # Usage: python game_optimized_2.py [seed]
+    #        python game_optimized_2.py --resume GAME_ID   (finish an interrupted game from its checkpoint)
+    if len(sys.argv) > 2 and sys.argv[1] == "--resume":
+        asyncio.run(main(resume=sys.argv[2]))
+    else:
+        asyncio.run(main(seed=int(sys.argv[1]) if len(sys.argv) > 1 else SETTINGS.seed))
\ No newline at end of file
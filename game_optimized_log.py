@@ -1,11 +1,32 @@
+import asyncio
+import hashlib
 import json
 import random
+import re
+import shelve
+from collections import Counter, defaultdict
 from datetime import datetime
 from typing import List, Dict, Optional
-from openai import AzureOpenAI
+import openai
+from openai import AsyncAzureOpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import os, sys
 
+try:
+    import orjson  # Optional: much faster encoding of the logs and metrics
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
 print("New Game Summary started...")
 
 # Load environment variables from .env file
@@ -16,6 +37,9 @@ api_key = os.getenv('AZURE_OPENAI_KEY')
 api_base = os.getenv('AZURE_OPENAI_ENDPOINT')
 api_version = "2024-06-01"
 deployment_name = os.getenv('AZURE_OPENAI_DEPLOYMENT')
+# Optional OpenAI-compatible endpoint that takes a request when the Azure deployment keeps failing
+fallback_base = os.getenv('FALLBACK_ENDPOINT')
+fallback_key = os.getenv('FALLBACK_API_KEY')
 
 if not all([api_key, api_base, deployment_name]):
     print("Error: Missing required environment variables")
@@ -25,6 +49,9 @@ if not all([api_key, api_base, deployment_name]):
     print("AZURE_OPENAI_DEPLOYMENT")
     sys.exit(1)
 
+if fallback_base and not fallback_key:
+    print("Warning: FALLBACK_ENDPOINT is set but FALLBACK_API_KEY is not; running without the fallback endpoint")
+
 # Configuration with 7 players, 2 discussion rounds, and experiment ID
 CONFIG = {
     "players": [
@@ -43,23 +70,122 @@ CONFIG = {
         "deployment_name": deployment_name,
         "api_version": api_version
     },
+    "fallback_openai": {
+        "base_url": fallback_base,
+        "api_key": fallback_key,
+        "model": os.getenv('FALLBACK_MODEL', deployment_name)
+    } if fallback_base and fallback_key else None,
     "discussion_rounds": 2,
+    "max_concurrent": 10,  # Most API requests in flight at once (night actions and votes run concurrently)
     "experiment_id": "experiment_" + datetime.now().strftime("%Y%m%d_%H%M%S"),  # Format: experiment_YYYYMMDD_HHMMSS
 }
 
+# Discussion and voting guidance per role. It doesn't change during a game, so it lives in the
+# system message (identical for every request) instead of being repeated in each player's prompt.
+ROLE_STRATEGIES = {
+    "Werewolf": [
+        "Try to blend in by accusing other players without drawing attention to yourself",
+        "Defend your fellow werewolves subtly, but don't make it obvious",
+        "Consider fake-claiming a role if pressured (but be careful, as this is risky)"
+    ],
+    "Seer": [
+        "you are the main guy to help the villagers, because you can check a player in each round. if you get to know who the wearwolf is. try eliminating them, and guide others to vote them out as well. ",
+        "If you've found a werewolf, consider carefully when to reveal this information",
+        "If pressured, you should your role to save yourself or confirm information"
+    ],
+    "Medic": [
+        "Keep your role secret to avoid being targeted by werewolves",
+        "Pay attention to discussions to identify potential Seers to protect",
+        "Vary your protection targets to be unpredictable"
+    ],
+    "Villager": [
+        "look for what the seer says. they know useful information",
+        "Be careful about who you trust, but work with others to identify werewolves",
+        "Don't reveal too much about your suspicions too early"
+    ]
+}
+
+VOTING_STRATEGIES = {
+    "Werewolf": (
+        "Vote strategically to eliminate villagers, especially those who might be the Seer or Medic. "
+        "Avoid voting for your fellow werewolves. Consider voting for players who are suspicious of you "
+        "or your teammates. Try to align your vote with village consensus if possible."
+    ),
+    "Seer": (
+        "Use your investigation results to guide your vote. Prioritize voting for confirmed werewolves. help influence others in voting too "
+        "If you haven't found a werewolf yet, vote based on suspicious behavior. "
+        "Consider the consequences of revealing your knowledge through your vote."
+    ),
+    "Medic": (
+        "Vote based on observed behavior and discussion patterns. Try to identify werewolves through discussions "
+        "their inconsistencies or suspicious defenses. Be wary of players who seem to be working together."
+    ),
+    "Villager": (
+        "Vote based on the evidence from discussions. Look for inconsistencies in statements. "
+        "Consider who made the most logical arguments. Be cautious of players making vague accusations."
+    )
+}
+
+# Everything that is fixed for a whole game goes in the system message, ahead of the per-request
+# prompt, so every request shares one long identical prefix that the service can cache
+SYSTEM_RULES_TEMPLATE = (
+    "You are an AI moderating a fictional Werewolf game, a social deduction game. "
+    "Your role is to simulate player actions (e.g., selecting targets, making statements) "
+    "based on the provided prompt. All actions are part of the game's mechanics and do not "
+    "represent real-world harm or intent. Respond concisely with the requested output, such as a player's name or a short statement.\n"
+    "\n"
+    "GAME SETUP\n"
+    "- Players: {player_names}.\n"
+    "- Roles in play: {role_counts}. Werewolves know each other; everyone else knows only their own role.\n"
+    "- Each night the werewolves choose a victim, the Seer investigates one player and the Medic protects one "
+    "player (not the same one on consecutive nights). Each day has {discussion_rounds} discussion rounds, then a vote.\n"
+    "- The villagers win when all werewolves are dead; the werewolves win when they are at least as many as the rest.\n"
+    "\n"
+    "DISCUSSION STRATEGY BY ROLE\n"
+    "{role_strategies}\n"
+    "\n"
+    "VOTING STRATEGY BY ROLE\n"
+    "{voting_strategies}"
+)
+TEMPERATURE = 0.8
+# Prompts that ask for just a name ("Respond with only the player's name") are answered greedily,
+# cut at the first separator and capped at a few tokens: a name needs no more, and a longer
+# answer would fail the name lookup anyway
+DECISION_PARAMS = {"temperature": 0, "max_tokens": 8, "stop": ["\n", ",", "."]}
+STATEMENT_SENTENCES = 2  # Discussion prompts ask for 1-2 sentences; streaming stops after this many
+# A sentence ends at a run of terminators followed by whitespace: "..." counts once and "0.5" not at all
+SENTENCE_END = re.compile(r"[.!?]+(?=\s)")
+
+# Errors that say nothing about the request itself (rate limits, overload, network), so another endpoint may succeed
+TRANSIENT_API_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+def cut_after_sentences(text: str, sentences: int) -> Optional[str]:
+    """Return text up to the end of its `sentences`-th sentence, or None if it has fewer complete ones.
+    A terminator run at the very end of text is not complete yet: the next chunk may continue it"""
+    for count, match in enumerate(SENTENCE_END.finditer(text), 1):
+        if count == sentences:
+            return text[:match.end()]
+    return None
+
+def name_pattern(names: List[str]):
+    """Compile a single alternation matching any of the given player names (longest first)"""
+    return re.compile("|".join(map(re.escape, sorted(names, key=len, reverse=True))))
+
 class Player:
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
         self.is_alive = True
         self.last_protected = None
-        self.knowledge = []  # All players track suspicions or Seer investigations
+        self.suspicions = {}  # player_name -> suspicion_level (0-1), updated from the player's own statements
         self.suspicion_changes = []  # Track suspicion updates
         self.statements = []  # Track statements made by the player
         if self.role == "Seer":
             self.knowledge = []  # List of (player_name, "Werewolf" or "Not a Werewolf")
         else:
-            self.knowledge = []  # List of (player_name, suspicion_level) where suspicion_level is 0-1
+            self.knowledge = self.suspicions  # Everyone else only knows their suspicions
+        self.knowledge_version = 0  # Bumped whenever knowledge changes; keys the formatted-string cache
+        self.knowledge_str_cache = None  # (knowledge_version, formatted knowledge)
 
     def __str__(self):
         return f"{self.name} ({self.role}, {'Alive' if self.is_alive else 'Dead'})"
@@ -76,6 +202,11 @@ class GameLogger:
         self.logs = []
         self.discussions = []
         self.prompts = []
+        # Events and discussions are appended to a JSONL file next to their log as they happen
+        # (one line per entry); the JSON arrays are written once, by finalize(). Prompts are
+        # only read after the game and are by far the largest log, so they stay in memory until then.
+        self._log_fp = open(self.log_file + "l", "wb", buffering=32 * 1024)
+        self._discussion_fp = open(self.discussion_file + "l", "wb", buffering=32 * 1024)
 
     def log_event(self, event_type: str, data: Dict):
         log_entry = {
@@ -84,27 +215,44 @@ class GameLogger:
             "data": data
         }
         self.logs.append(log_entry)
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+        self._log_fp.write(_dumps_line(log_entry))
     
     def log_discussion(self, event_type: str, data: Dict):
         disc_entry = {
             "data": data
         }
         self.discussions.append(disc_entry)
-        with open(self.discussion_file, 'w') as f:
-            json.dump(self.discussions, f, indent=2)
+        self._discussion_fp.write(_dumps_line(disc_entry))
             
     def log_prompts(self, event_type: str, data: Dict):
         prompt_entry = {
             "data": data
         }
         self.prompts.append(prompt_entry)
-        with open(self.prompts_file, 'w') as f:
-            json.dump(self.prompts, f, indent=2)
+
+    def close(self):
+        """Flush and close the JSONL logs (safe to call more than once)"""
+        for fp in (self._log_fp, self._discussion_fp):
+            fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def finalize(self):
+        """Close the JSONL logs and write each log once as the JSON array the .json files hold.
+        The arrays are compact; `python -m json.tool <file>` pretty-prints one for reading."""
+        self.close()
+        for entries, path in [(self.logs, self.log_file), (self.discussions, self.discussion_file),
+                              (self.prompts, self.prompts_file)]:
+            with open(path, 'wb') as f:
+                f.write(_dumps(entries))
 
 class WerewolfGame:
-    def __init__(self, players: List[Dict], azure_config: Dict, discussion_rounds: int, experiment_id: str, randomize_roles=True):
+    def __init__(self, players: List[Dict], azure_config: Dict, discussion_rounds: int, experiment_id: str, randomize_roles=True,
+                 max_concurrent: int = 10, fallback_config: Optional[Dict] = None):
         player_list = [p for p in players if p["role"] != "Moderator"]
         
         # Randomize roles if requested
@@ -117,18 +265,45 @@ class WerewolfGame:
             self.players = [Player(p["name"], p["role"]) for p in player_list]
         
         self.moderator = Player("Moderator", "Moderator")
+        # Player lists only change on deaths (see _kill), so they are cached between them
+        self._alive_cache = self._werewolf_cache = self._villager_cache = None
+        # Alive counts per side, kept up to date by _kill for the win check
+        self._alive_wolf_count = sum(p.role == "Werewolf" for p in self.players)
+        self._alive_villager_count = len(self.players) - self._alive_wolf_count
         start_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.experiment_folder = os.path.join("experiments", experiment_id)
         self.logger = GameLogger(f"werewolf_game_log_{start_time}.json", self.experiment_folder)
-        self.metrics_file = os.path.join(self.experiment_folder, f"game_metrics_{start_time}.json")
+        # One metrics line per game, appended to a file shared by the whole experiment
+        self.metrics_file = os.path.join(self.experiment_folder, "game_metrics_all.jsonl")
         self.round = 0
         self.game_history = []
-        self.client = AzureOpenAI(
+        self.client = AsyncAzureOpenAI(
             azure_endpoint=azure_config["endpoint"],
             api_key=azure_config["api_key"],
-            api_version=azure_config["api_version"]
+            api_version=azure_config["api_version"],
+            # The SDK retries 429s, 5xx, timeouts and connection errors with exponential backoff,
+            # waiting as long as a Retry-After header asks
+            max_retries=4
         )
         self.deployment_name = azure_config["deployment_name"]
+        self.fallback_client = self.fallback_model = None
+        if fallback_config:
+            self.fallback_client = AsyncOpenAI(base_url=fallback_config["base_url"], api_key=fallback_config["api_key"])
+            self.fallback_model = fallback_config["model"]
+        role_counts = {}
+        for p in self.players:
+            role_counts[p.role] = role_counts.get(p.role, 0) + 1
+        self.system_message = SYSTEM_RULES_TEMPLATE.format(
+            player_names=", ".join(p.name for p in self.players),
+            role_counts=", ".join(f"{count} {role}" for role, count in sorted(role_counts.items())),
+            discussion_rounds=discussion_rounds,
+            role_strategies="\n".join(f"{role}:\n" + "\n".join(f"- {s}" for s in strategies)
+                                      for role, strategies in ROLE_STRATEGIES.items()),
+            voting_strategies="\n".join(f"- {role}: {strategy}" for role, strategy in VOTING_STRATEGIES.items())
+        )
+        self.api_semaphore = asyncio.Semaphore(max_concurrent)  # Cap on in-flight API requests
+        # On-disk completions keyed by a hash of the full request; kept per experiment folder
+        self.response_cache = shelve.open(os.path.join(self.experiment_folder, "llm_cache"))
         self.discussion_rounds = discussion_rounds
         self.metrics = {
             "rounds_played": 0,
@@ -149,47 +324,99 @@ class WerewolfGame:
         if randomize_roles:
             self.logger.log_event("randomized_roles", {p.name: p.role for p in self.players})
 
+    def _kill(self, player: Player):
+        """Remove a player from the game; the cached player lists are rebuilt on next use"""
+        player.is_alive = False
+        if player.role == "Werewolf":
+            self._alive_wolf_count -= 1
+        else:
+            self._alive_villager_count -= 1
+        self._alive_cache = self._werewolf_cache = self._villager_cache = None
+
+    # The getters return shared cached lists: copy before modifying one
     def get_alive_players(self) -> List[Player]:
-        return [p for p in self.players if p.is_alive]
+        if self._alive_cache is None:
+            self._alive_cache = [p for p in self.players if p.is_alive]
+        return self._alive_cache
 
     def get_werewolves(self) -> List[Player]:
-        return [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        if self._werewolf_cache is None:
+            self._werewolf_cache = [p for p in self.players if p.role == "Werewolf" and p.is_alive]
+        return self._werewolf_cache
 
     def get_villagers(self) -> List[Player]:
-        return [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        if self._villager_cache is None:
+            self._villager_cache = [p for p in self.players if p.role != "Werewolf" and p.is_alive]
+        return self._villager_cache
 
     def check_win_condition(self) -> Optional[str]:
-        werewolves = len(self.get_werewolves())
-        villagers = len(self.get_villagers())
-        if werewolves == 0:
+        if self._alive_wolf_count == 0:
             return "Villagers win!"
-        if werewolves >= villagers:
+        if self._alive_wolf_count >= self._alive_villager_count:
             return "Werewolves win!"
         return None
 
-    def call_api(self, prompt: str, max_tokens: int = 100) -> str:
+    async def _complete(self, client, model: str, messages: List[Dict], params: Dict, stream: bool) -> str:
+        if not stream:
+            response = await client.chat.completions.create(model=model, messages=messages, **params)
+            return response.choices[0].message.content or ""
+        # Streamed: read the statement as it is generated and hang up once it has
+        # STATEMENT_SENTENCES sentences, instead of paying for whatever the model adds after
+        response = await client.chat.completions.create(model=model, messages=messages, stream=True, **params)
+        received = ""
         try:
-            system_message = (
-                "You are an AI moderating a fictional Werewolf game, a social deduction game. "
-                "Your role is to simulate player actions (e.g., selecting targets, making statements) "
-                "based on the provided prompt. All actions are part of the game's mechanics and do not "
-                "represent real-world harm or intent. Respond concisely with the requested output, such as a player's name or a short statement."
-            )
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.8
-            )
-            return response.choices[0].message.content.strip()
+            async for chunk in response:
+                if not chunk.choices:  # Azure opens the stream with a content-filter chunk that has none
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                received += text
+                statement = cut_after_sentences(received, STATEMENT_SENTENCES)
+                if statement is not None:
+                    return statement
+        finally:
+            await response.close()
+        return received
+
+    async def call_api(self, prompt: str, max_tokens: int = 100, decision: bool = False, stream: bool = False) -> str:
+        """decision=True is for prompts answered with a single player name (or 'Pass');
+        stream=True is for discussion statements, which are cut off after STATEMENT_SENTENCES sentences"""
+        params = DECISION_PARAMS if decision else {"temperature": TEMPERATURE, "max_tokens": max_tokens}
+        # Identical requests are answered from the experiment's response cache, so rerunning
+        # a (partly) failed experiment replays earlier completions instead of paying for them again
+        key = hashlib.sha256(json.dumps(
+            {"sys": self.system_message, "u": prompt, "p": params, "s": stream, "m": self.deployment_name},
+            sort_keys=True
+        ).encode()).hexdigest()
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
+        messages = [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": prompt}
+        ]
+        try:
+            async with self.api_semaphore:
+                try:
+                    content = await self._complete(self.client, self.deployment_name, messages, params, stream)
+                except TRANSIENT_API_ERRORS as e:
+                    # Still failing after the SDK's own retries: hand the request to the fallback endpoint
+                    if self.fallback_client is None:
+                        raise
+                    self.logger.log_event("api_fallback", {"error": str(e)})
+                    content = await self._complete(self.fallback_client, self.fallback_model, messages, params, stream)
+            content = content.strip()
+            self.response_cache[key] = content
+            return content
         except Exception as e:
             print(f"API error: {e}")
             self.logger.log_event("api_error", {"prompt": prompt, "error": str(e)})
             return ""
 
+    async def _no_call(self) -> str:
+        return ""
+
     def get_summarized_history(self):
         if not self.game_history:
             return "Game just started."
@@ -201,22 +428,28 @@ class WerewolfGame:
         return summary
 
     def format_player_knowledge(self, player):
+        """Formatted knowledge for prompts (cached until the knowledge changes)"""
+        cache = player.knowledge_str_cache
+        if cache is None or cache[0] != player.knowledge_version:
+            cache = player.knowledge_str_cache = (player.knowledge_version, self._render_player_knowledge(player))
+        return cache[1]
+
+    def _render_player_knowledge(self, player):
         if not player.knowledge:
             return "No specific knowledge yet."
         if player.role == "Seer":
             return "\n".join([f"- {name}: {result}" for name, result in player.knowledge])
         else:
             suspicions = []
-            for name, level in player.knowledge:
-                if isinstance(level, float):
-                    if level >= 0.7:
-                        suspicions.append(f"- {name}: Highly suspicious")
-                    elif level >= 0.4:
-                        suspicions.append(f"- {name}: Somewhat suspicious")
-                    elif level <= 0.2:
-                        suspicions.append(f"- {name}: Likely innocent")
-                    else:
-                        suspicions.append(f"- {name}: Neutral/Uncertain")
+            for name, level in player.knowledge.items():
+                if level >= 0.7:
+                    suspicions.append(f"- {name}: Highly suspicious")
+                elif level >= 0.4:
+                    suspicions.append(f"- {name}: Somewhat suspicious")
+                elif level <= 0.2:
+                    suspicions.append(f"- {name}: Likely innocent")
+                else:
+                    suspicions.append(f"- {name}: Neutral/Uncertain")
             return "\n".join(suspicions) if suspicions else "No clear suspicions yet."
 
     def summarize_statements(self, all_discussions):
@@ -246,19 +479,17 @@ class WerewolfGame:
     def extract_key_accusations(self, all_discussions):
         if not all_discussions:
             return "No discussions yet."
-        all_statements = []
+        alive_names = [p.name for p in self.get_alive_players()]
+        names_re = name_pattern(alive_names)
+        order = {name: i for i, name in enumerate(alive_names)}
+        player_mentions = defaultdict(list)
         for disc_round in all_discussions:
             for stmt in disc_round.get("statements", []):
-                all_statements.append(stmt)
-        player_mentions = {}
-        for stmt in all_statements:
-            speaker = stmt.get("player", "Unknown")
-            statement = stmt.get("statement", "")
-            for player in self.get_alive_players():
-                if player.name in statement and player.name != speaker:
-                    if player.name not in player_mentions:
-                        player_mentions[player.name] = []
-                    player_mentions[player.name].append(f"{speaker}: {statement}")
+                speaker = stmt.get("player", "Unknown")
+                statement = stmt.get("statement", "")
+                # One scan per statement; mentioned names in alive-player order, each once
+                for name in sorted(set(names_re.findall(statement)) - {speaker}, key=order.get):
+                    player_mentions[name].append(f"{speaker}: {statement}")
         key_mentions = []
         for player_name, mentions in player_mentions.items():
             if mentions:
@@ -267,75 +498,7 @@ class WerewolfGame:
                     key_mentions.append(f"- {mention}")
         return "\n".join(key_mentions) if key_mentions else "No significant accusations or defenses yet."
 
-    def get_role_strategy(self, player, discussion_round):
-        alive_players = self.get_alive_players()
-        if player.role == "Werewolf":
-            strategies = [
-                "Try to blend in by accusing other players without drawing attention to yourself",
-                "Defend your fellow werewolves subtly, but don't make it obvious",
-                "Consider fake-claiming a role if pressured (but be careful, as this is risky)",
-                "Try to create confusion by casting doubt on vocal players"
-            ]
-            if discussion_round == 1:
-                strategies.append("In the first round, observe before making strong accusations")
-            else:
-                strategies.append("Build on previous discussions to seem consistent")
-            if len(self.get_werewolves()) < len(alive_players) // 3:
-                strategies.append("Your team is outnumbered - focus on survival rather than aggression")
-            return "\n".join([f"- {s}" for s in strategies[:3]])
-        elif player.role == "Seer":
-            strategies = [
-                "you are the main guy to help the villagers, because you can check a player in each round. if you get to know who the wearwolf is. try eliminating them, and guide others to vote them out as well. ",
-                "If you've found a werewolf, consider carefully when to reveal this information",
-                "If pressured, you should your role to save yourself or confirm information",
-                "Pay attention to contradictions in player statements compared to your knowledge"
-            ]
-            werewolf_found = any(result == "Werewolf" for _, result in player.knowledge)
-            if werewolf_found:
-                strategies.append("You've identified a werewolf - consider how to use this information most effectively")
-            return "\n".join([f"- {s}" for s in strategies[:3]])
-        elif player.role == "Medic":
-            strategies = [
-                "Keep your role secret to avoid being targeted by werewolves",
-                "Pay attention to discussions to identify potential Seers to protect",
-                "Vary your protection targets to be unpredictable",
-                "Consider protecting players who are under suspicion but you believe are innocent"
-            ]
-            return "\n".join([f"- {s}" for s in strategies[:3]])
-        else:  # Villager
-            strategies = [
-                "look for what the seer says. they know useful information",
-                "Be careful about who you trust, but work with others to identify werewolves",
-                "Don't reveal too much about your suspicions too early",
-                "Pay attention to voting patterns from previous rounds"
-            ]
-            return "\n".join([f"- {s}" for s in strategies[:3]])
-
-    def get_voting_strategy(self, player):
-        if player.role == "Werewolf":
-            return (
-                "Vote strategically to eliminate villagers, especially those who might be the Seer or Medic. "
-                "Avoid voting for your fellow werewolves. Consider voting for players who are suspicious of you "
-                "or your teammates. Try to align your vote with village consensus if possible."
-            )
-        elif player.role == "Seer":
-            return (
-                "Use your investigation results to guide your vote. Prioritize voting for confirmed werewolves. help influence others in voting too "
-                "If you haven't found a werewolf yet, vote based on suspicious behavior. "
-                "Consider the consequences of revealing your knowledge through your vote."
-            )
-        elif player.role == "Medic":
-            return (
-                "Vote based on observed behavior and discussion patterns. Try to identify werewolves through discussions "
-                "their inconsistencies or suspicious defenses. Be wary of players who seem to be working together."
-            )
-        else:  # Villager
-            return (
-                "Vote based on the evidence from discussions. Look for inconsistencies in statements. "
-                "Consider who made the most logical arguments. Be cautious of players making vague accusations."
-            )
-
-    def night_phase(self):
+    async def night_phase(self):
         self.round += 1
         self.metrics["rounds_played"] = self.round
         self.logger.log_event("night_start", {"round": self.round})
@@ -347,43 +510,36 @@ class WerewolfGame:
         player_names = [p.name for p in alive_players]
         print(f"\nAlive Players: {', '.join(player_names)}")
 
-        # Werewolf selection
+        # The three night actions don't depend on each other, so their prompts are built
+        # first and the API calls run concurrently
+        history_summary = self.get_summarized_history()
         werewolves = self.get_werewolves()
+        werewolf_prompt = seer_prompt = medic_prompt = None
         if werewolves:
             werewolf_names = [p.name for p in werewolves]
             print(f"\nWerewolves ({', '.join(werewolf_names)}) are choosing their target...")
-            prompt = (
+            werewolf_prompt = (
+                f"Game history summary: {history_summary}\n"
                 f"In the fictional Werewolf game, you are a Werewolf. Your team: {werewolf_names}. "
                 f"Alive players: {player_names}.\n"
-                f"Game history summary: {self.get_summarized_history()}\n"
                 f"Strategic considerations:\n"
                 f"- Target influential players who might be the Seer or Medic\n"
                 f"- Avoid targeting players who were protected previously\n"
                 f"- Consider eliminating players who are suspicious of werewolves\n"
                 f"Select one player as the target for this round. Respond with only the player's name."
             )
-            victim_name = self.call_api(prompt)
-            victim = next((p for p in alive_players if p.name == victim_name), None)
-            if not victim:
-                victim = random.choice(alive_players)  # Fallback
-            self.logger.log_event("werewolf_choice", {"victim": victim.name})
-            print(f"Werewolves have chosen to target: {victim.name}")
-        else:
-            victim = None
-            print("\nNo werewolves remain!")
 
-        # Seer investigation
         seer = next((p for p in alive_players if p.role == "Seer"), None)
         if seer:
             print(f"\n{seer.name} (Seer) is investigating a player...")
-            valid_targets = [p for p in alive_players if p.name != seer.name]
-            valid_names = [p.name for p in valid_targets]
+            valid_seer_targets = [p for p in alive_players if p.name != seer.name]
+            valid_seer_names = [p.name for p in valid_seer_targets]
             investigated = [name for name, _ in seer.knowledge]
-            uninvestigated = [p.name for p in valid_targets if p.name not in investigated]
-            if valid_names:
-                prompt = (
-                    f"In the fictional Werewolf game, you are the Seer. Alive players (excluding yourself): {valid_names}.\n"
-                    f"Game history summary: {self.get_summarized_history()}\n"
+            uninvestigated = [p.name for p in valid_seer_targets if p.name not in investigated]
+            if valid_seer_names:
+                seer_prompt = (
+                    f"Game history summary: {history_summary}\n"
+                    f"In the fictional Werewolf game, you are the Seer. Alive players (excluding yourself): {valid_seer_names}.\n"
                     f"Your previous investigations: {seer.knowledge}\n"
                     f"Players you haven't investigated yet: {uninvestigated}\n"
                     f"Strategic considerations:\n"
@@ -392,15 +548,52 @@ class WerewolfGame:
                     f"- Balance between checking new players and verifying suspicions\n"
                     f"Select one player to investigate their role. Respond with only the player's name."
                 )
-                target_name = self.call_api(prompt)
-                target = next((p for p in valid_targets if p.name == target_name), None)
+
+        medic = next((p for p in alive_players if p.role == "Medic"), None)
+        if medic:
+            print(f"\n{medic.name} (Medic) is choosing who to protect...")
+            valid_medic_targets = [p for p in alive_players if p.name != medic.last_protected]
+            valid_medic_names = [p.name for p in valid_medic_targets]
+            medic_prompt = (
+                f"Game history summary: {history_summary}\n"
+                f"In the fictional Werewolf game, you are the Medic. Alive players: {valid_medic_names}.\n"
+                f"You cannot protect {medic.last_protected or 'none'} again this round.\n"
+                f"Strategic considerations:\n"
+                f"- Protect players who might be the Seer or other key roles\n"
+                f"- Consider protecting players who are vocal against werewolves\n"
+                f"- Avoid predictable protection patterns\n"
+                f"Select one player to protect this round. Respond with only the player's name."
+            )
+
+        victim_name, target_name, protected_name = await asyncio.gather(
+            self.call_api(werewolf_prompt, decision=True) if werewolf_prompt else self._no_call(),
+            self.call_api(seer_prompt, decision=True) if seer_prompt else self._no_call(),
+            self.call_api(medic_prompt, decision=True) if medic_prompt else self._no_call()
+        )
+
+        # Werewolf selection
+        if werewolves:
+            victim = next((p for p in alive_players if p.name == victim_name), None)
+            if not victim:
+                victim = random.choice(alive_players)  # Fallback
+            self.logger.log_event("werewolf_choice", {"victim": victim.name})
+            print(f"Werewolves have chosen to target: {victim.name}")
+        else:
+            victim = None
+            print("\nNo werewolves remain!")
+
+        # Seer investigation
+        if seer:
+            if valid_seer_names:
+                target = next((p for p in valid_seer_targets if p.name == target_name), None)
                 if not target:
                     if uninvestigated:
-                        target = next((p for p in valid_targets if p.name in uninvestigated), None)
+                        target = next((p for p in valid_seer_targets if p.name in uninvestigated), None)
                     else:
-                        target = random.choice(valid_targets)
+                        target = random.choice(valid_seer_targets)
                 result = "Werewolf" if target.role == "Werewolf" else "Not a Werewolf"
                 seer.knowledge.append((target.name, result))
+                seer.knowledge_version += 1
                 self.metrics["total_seer_investigations"] += 1
                 self.logger.log_event("seer_investigation", {"seer": seer.name, "target": target.name, "result": result})
                 print(f"{seer.name} investigated {target.name} and found they are {result}")
@@ -411,23 +604,8 @@ class WerewolfGame:
             print("\nNo Seer remains!")
 
         # Medic protection
-        medic = next((p for p in alive_players if p.role == "Medic"), None)
         if medic:
-            print(f"\n{medic.name} (Medic) is choosing who to protect...")
-            valid_targets = [p for p in alive_players if p.name != medic.last_protected]
-            valid_names = [p.name for p in valid_targets]
-            prompt = (
-                f"In the fictional Werewolf game, you are the Medic. Alive players: {valid_names}.\n"
-                f"Game history summary: {self.get_summarized_history()}\n"
-                f"You cannot protect {medic.last_protected or 'none'} again this round.\n"
-                f"Strategic considerations:\n"
-                f"- Protect players who might be the Seer or other key roles\n"
-                f"- Consider protecting players who are vocal against werewolves\n"
-                f"- Avoid predictable protection patterns\n"
-                f"Select one player to protect this round. Respond with only the player's name."
-            )
-            protected_name = self.call_api(prompt)
-            protected = next((p for p in valid_targets if p.name == protected_name), None)
+            protected = next((p for p in valid_medic_targets if p.name == protected_name), None)
             if protected:
                 medic.last_protected = protected.name
                 self.logger.log_event("medic_protection", {"medic": medic.name, "protected": protected.name})
@@ -444,7 +622,7 @@ class WerewolfGame:
             self.game_history.append(f"Night {self.round}: No one was killed")
             print(f"\n{protected.name} was protected by the Medic and survived the night!")
         elif victim:
-            victim.is_alive = False
+            self._kill(victim)
             self.logger.log_event("night_result", {"victim": victim.name, "saved": False})
             self.game_history.append(f"Night {self.round}: {victim.name} was killed")
             print(f"\n{victim.name} was killed by the werewolves!")
@@ -452,7 +630,7 @@ class WerewolfGame:
             self.game_history.append(f"Night {self.round}: No one was killed")
             print("\nNo one was killed during the night!")
 
-    def day_phase(self):
+    async def day_phase(self):
         self.logger.log_event("day_start", {"round": self.round})
         print(f"\n{'='*50}")
         print(f"Day Phase - Round {self.round}")
@@ -460,9 +638,15 @@ class WerewolfGame:
         
         alive_players = self.get_alive_players()
         player_names = [p.name for p in alive_players]
-        print(f"\nAlive Players: {', '.join(player_names)}")
+        alive_csv = ", ".join(player_names)  # Fixed for the whole day; every prompt reuses it
+        print(f"\nAlive Players: {alive_csv}")
         
+        # Werewolf role lines don't change during the day either
+        werewolf_names = [p.name for p in self.get_werewolves()]
+        teammates_by_wolf = {name: ", ".join(n for n in werewolf_names if n != name) for name in werewolf_names}
         game_summary = self.get_summarized_history()
+        names_re = name_pattern(player_names)
+        villager_names = {p.name for p in self.get_villagers()}
         all_discussions = []
         all_prompts = []
 
@@ -473,34 +657,34 @@ class WerewolfGame:
             discussion = []
             prompts = []
             previous_statements_summary = self.summarize_statements(all_discussions) if all_discussions else "No previous discussion yet."
-            random.shuffle(alive_players)
-            for player in alive_players:
+            # A fresh speaking order per round; alive_players itself keeps seating order
+            speaking_order = random.sample(alive_players, len(alive_players))
+            for player in speaking_order:
                 current_round_statements = "\n".join([f"{p['player']}: {p['statement']}" for p in discussion]) if discussion else "No statements yet."
                 knowledge_str = self.format_player_knowledge(player)
-                strategy_guidance = self.get_role_strategy(player, discussion_round)
                 if player.role == "Werewolf":
-                    werewolves = self.get_werewolves()
-                    teammates = [p.name for p in werewolves if p != player]
-                    role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
+                    role_info = f"You are a Werewolf. Your teammates are {teammates_by_wolf[player.name]}."
                 elif player.role == "Seer":
                     role_info = f"You are the Seer. Your investigations: {knowledge_str}."
                 else:
                     role_info = f"You are a {player.role}."
+                # Shared game state first, then what is specific to this player
                 prompt = (
-                    f"In the fictional Werewolf game, {role_info}\n"
                     f"Game summary: {game_summary}\n"
-                    f"Alive players: {', '.join(player_names)}\n"
+                    f"Alive players: {alive_csv}\n"
                     f"Discussion round {discussion_round} of {self.discussion_rounds}\n"
                     f"Previous discussion rounds summary: {previous_statements_summary}\n"
                     f"Current round statements: {current_round_statements}\n"
+                    f"In the fictional Werewolf game, {role_info}\n"
                     f"Your knowledge: {knowledge_str}\n"
-                    f"Strategic guidance: {strategy_guidance}\n"
+                    f"Follow the {player.role} discussion strategy.\n"
                     f"Now, as {player.name}, make a strategic statement about who you suspect or defend. "
                     f"Your statement should directly advance your win condition while appearing logical to others. "
                     f"Be specific with your reasoning and avoid vague statements. "
                     f"Respond with only your in-character statement (1-2 sentences)."
                 )
-                statement = self.call_api(prompt, max_tokens=75)
+                # Each statement sees the ones made before it this round, so discussion stays sequential
+                statement = await self.call_api(prompt, max_tokens=75, stream=True)
                 discussion.append({"player": player.name, "statement": statement})
                 prompts.append({"player": player.name, "prompt": prompt})
                 player.statements.append(f"Round {discussion_round}: {statement}")
@@ -508,24 +692,24 @@ class WerewolfGame:
                 self.metrics["total_discussion_statements"] += 1
                 if player.role == "Seer" and "I am the Seer" in statement:
                     self.metrics["seer_reveals"] += 1
-                if player.role == "Werewolf" and any(p.name in statement for p in self.get_villagers()):
+                # Names mentioned in the statement, found in one regex pass
+                mentioned = set(names_re.findall(statement))
+                if player.role == "Werewolf" and not mentioned.isdisjoint(villager_names):
                     self.metrics["werewolf_deceptions"] += 1
+                mentioned.discard(player.name)
                 for p in alive_players:
-                    if p.name != player.name and p.name in statement:
-                        existing_suspicion = next((level for name, level in player.knowledge if name == p.name and isinstance(level, float)), 0.0)
+                    if p.name in mentioned:
+                        existing_suspicion = player.suspicions.get(p.name, 0.0)
                         new_suspicion = min(existing_suspicion + 0.2, 1.0) if "suspect" in statement.lower() else max(existing_suspicion - 0.2, 0.0)
                         if existing_suspicion != new_suspicion:
-                            player.knowledge = [(name, level) for name, level in player.knowledge if name != p.name]
-                            player.knowledge.append((p.name, new_suspicion))
+                            player.suspicions[p.name] = new_suspicion
+                            player.knowledge_version += 1
                             player.suspicion_changes.append({"round": self.round, "discussion_round": discussion_round, "target": p.name, "new_suspicion": new_suspicion})
                             self.metrics["suspicion_changes"] += 1
-                current_targets = [p.name for p in alive_players if p.name in statement and p.name != player.name]
-                past_targets = []
+                past_targets = set()
                 for past_stmt in player.statements[:-1]:
-                    for p in alive_players:
-                        if p.name in past_stmt and p.name != player.name:
-                            past_targets.append(p.name)
-                if current_targets and all(target not in past_targets for target in current_targets):
+                    past_targets.update(names_re.findall(past_stmt))
+                if mentioned and mentioned.isdisjoint(past_targets):
                     self.metrics["statement_variety"] += 1
             all_discussions.append({"discussion_round": discussion_round, "statements": discussion})
             all_prompts.append({"discussion_round": discussion_round, "prompts": prompts})
@@ -537,31 +721,34 @@ class WerewolfGame:
         # Voting
         print("\nVoting Phase")
         print("-"*30)
-        votes = {}
-        for player in alive_players:
-            valid_targets = [p.name for p in alive_players if p.name != player.name]
+        # Ballots only depend on the finished discussion, so all prompts are built first
+        # and the votes are requested concurrently
+        ballots = []
+        discussion_summary = self.extract_key_accusations(all_discussions)  # Same for every voter
+        for i, player in enumerate(alive_players):
+            valid_targets = player_names[:i] + player_names[i + 1:]  # Everyone alive but the voter
             knowledge_str = self.format_player_knowledge(player)
-            voting_strategy = self.get_voting_strategy(player)
-            discussion_summary = self.extract_key_accusations(all_discussions)
             if player.role == "Werewolf":
-                werewolves = self.get_werewolves()
-                teammates = [p.name for p in werewolves if p != player]
-                role_info = f"You are a Werewolf. Your teammates are {', '.join(teammates)}."
+                role_info = f"You are a Werewolf. Your teammates are {teammates_by_wolf[player.name]}."
             elif player.role == "Seer":
                 role_info = f"You are the Seer. Your investigations: {knowledge_str}."
             else:
                 role_info = f"You are a {player.role}."
             prompt = (
-                f"In the fictional Werewolf game, {role_info}\n"
                 f"Game summary: {game_summary}\n"
-                f"Alive players (excluding yourself): {', '.join(valid_targets)}\n"
                 f"Key accusations and defenses from discussions:\n{discussion_summary}\n"
+                f"In the fictional Werewolf game, {role_info}\n"
+                f"Alive players (excluding yourself): {', '.join(valid_targets)}\n"
                 f"Your knowledge: {knowledge_str}\n"
-                f"Voting strategy: {voting_strategy}\n"
+                f"Follow the {player.role} voting strategy.\n"
                 f"Based on all information, vote for one player to eliminate, "
                 f"or respond with 'Pass' if you truly cannot decide. Respond with only the player's name or 'Pass'."
             )
-            vote = self.call_api(prompt)
+            ballots.append((player, valid_targets, prompt))
+
+        responses = await asyncio.gather(*(self.call_api(prompt, decision=True) for _, _, prompt in ballots))
+        votes = {}
+        for (player, valid_targets, prompt), vote in zip(ballots, responses):
             if vote == "Pass" or vote not in valid_targets:
                 votes[player.name] = "Pass"
                 print(f"{player.name} chose to pass their vote")
@@ -581,16 +768,13 @@ class WerewolfGame:
         # Tally votes
         print("\nVote Results:")
         print("-"*30)
-        vote_counts = {}
-        for vote in votes.values():
-            if vote != "Pass":
-                vote_counts[vote] = vote_counts.get(vote, 0) + 1
+        vote_counts = Counter(vote for vote in votes.values() if vote != "Pass")
         if vote_counts:
-            max_votes = max(vote_counts.values())
+            max_votes = vote_counts.most_common(1)[0][1]
             eliminated_name = random.choice([name for name, count in vote_counts.items() if count == max_votes])
             eliminated = next((p for p in alive_players if p.name == eliminated_name), None)
             if eliminated:
-                eliminated.is_alive = False
+                self._kill(eliminated)
                 self.logger.log_event("elimination", {"eliminated": eliminated.name})
                 self.game_history.append(f"Day {self.round}: {eliminated.name} was eliminated")
                 print(f"{eliminated.name} was eliminated with {max_votes} votes!")
@@ -619,28 +803,39 @@ class WerewolfGame:
             "werewolf_deception_rate": self.metrics["werewolf_deceptions"] / self.metrics["total_discussion_statements"] if self.metrics["total_discussion_statements"] > 0 else 0
         }
         os.makedirs(self.experiment_folder, exist_ok=True)
-        with open(self.metrics_file, 'w') as f:
-            json.dump(metrics_summary, f, indent=2)
-
-    def run(self):
-        self.logger.log_event("game_start", {"players": [(p.name, p.role) for p in self.players]})
-        while True:
-            self.night_phase()
-            print("Night phase started...")
-            win_result = self.check_win_condition()
-            if win_result:
-                self.metrics["winner"] = win_result
-                self.logger.log_event("game_end", {"result": win_result})
-                self.save_metrics()
-                break
-            self.day_phase()
-            print("Day phase started...")
-            win_result = self.check_win_condition()
-            if win_result:
-                self.metrics["winner"] = win_result
-                self.logger.log_event("game_end", {"result": win_result})
-                self.save_metrics()
-                break
+        # A single append of one short line, so games finishing at the same time don't interleave
+        with open(self.metrics_file, 'ab') as f:
+            f.write(_dumps_line(metrics_summary))
+
+    async def run(self):
+        # The logger closes (flushing the JSONL files) and the response cache is saved even if
+        # the game dies part-way, so a rerun of the experiment can replay what was already paid for
+        with self.logger:
+            try:
+                self.logger.log_event("game_start", {"players": [(p.name, p.role) for p in self.players]})
+                while True:
+                    await self.night_phase()
+                    print("Night phase started...")
+                    win_result = self.check_win_condition()
+                    if win_result:
+                        self.metrics["winner"] = win_result
+                        self.logger.log_event("game_end", {"result": win_result})
+                        self.save_metrics()
+                        break
+                    await self.day_phase()
+                    print("Day phase started...")
+                    win_result = self.check_win_condition()
+                    if win_result:
+                        self.metrics["winner"] = win_result
+                        self.logger.log_event("game_end", {"result": win_result})
+                        self.save_metrics()
+                        break
+                self.logger.finalize()
+            finally:
+                await self.client.close()
+                if self.fallback_client is not None:
+                    await self.fallback_client.close()
+                self.response_cache.close()
         print(f"Game Over: {win_result}")
 
 if __name__ == "__main__":
@@ -649,6 +844,8 @@ if __name__ == "__main__":
         CONFIG["azure_openai"],
         CONFIG["discussion_rounds"],
         CONFIG["experiment_id"],
-        randomize_roles=True
+        randomize_roles=True,
+        max_concurrent=CONFIG["max_concurrent"],
+        fallback_config=CONFIG["fallback_openai"]
     )
-    game.run()
\ No newline at end of file
+    asyncio.run(game.run())
\ No newline at end of file
@@ -1,10 +1,38 @@
 import os
 import json
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Headless: only PNGs are written, so skip GUI backend setup
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import glob
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Optional: a much faster JSON parser
+    _loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    _loads = json.loads  # Accepts bytes as well, so both parsers read the files in binary mode
+
+def _load_json(path):
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+def iter_metrics(path):
+    """Yield the metrics records in a file: one per line for .jsonl, otherwise the single JSON document."""
+    if path.endswith('.jsonl'):
+        # Parse line by line, so a large results file never has to sit in memory whole
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
+    else:
+        yield _load_json(path)
+
+# PNG save settings: 150 dpi and fast zlib compression keep the many small plots quick to write
+SAVE_OPTIONS = {'dpi': 150, 'pil_kwargs': {'compress_level': 1}}
 
 # Set the root directory where the experiment folders are located
 root_dir = "experiments"
@@ -17,42 +45,63 @@ required_keys = [
     'game_id', 'rounds_played', 'winner', 'seer_accuracy', 'voting_accuracy', 'suspicion_change_rate', 'vote_discussion_alignment',
     'statement_variety_rate', 'werewolf_deception_rate'
 ]
+REQUIRED_KEY_SET = frozenset(required_keys)  # For the per-file check; required_keys keeps the reporting order
+
+# experiment_seer_4o_* runs used 4o, any other experiment_seer_* run used 4o-mini
+MODEL_PATTERN = re.compile(r'experiment_seer_(4o_)?')
+
+def check_metrics(metrics, file_path):
+    """Check one metrics record. Returns (metrics, None), or (None, reason) when the record is skipped."""
+    # Verify that metrics is a dictionary
+    if not isinstance(metrics, dict):
+        return None, f"Skipping {file_path}: JSON is not a dictionary, got {type(metrics)}"
+    # Check for all required keys
+    missing_keys = REQUIRED_KEY_SET.difference(metrics)
+    if missing_keys:
+        return None, f"Skipping {file_path}: Missing keys {[key for key in required_keys if key in missing_keys]}"
+    # Check if rounds_played is valid
+    if not isinstance(metrics['rounds_played'], (int, float)):
+        return None, f"Skipping {file_path}: Invalid rounds_played value {metrics['rounds_played']}"
+    # Extract experiment name and determine model
+    experiment_name = os.path.basename(os.path.dirname(file_path))
+    match = MODEL_PATTERN.match(experiment_name)
+    if not match:
+        return None, f"Skipping {file_path}: Unknown model for experiment {experiment_name}"
+    model = '4o' if match.group(1) else '4o-mini'
+    metrics['experiment'] = experiment_name
+    metrics['model'] = model
+    return metrics, None
+
+def parse_metrics_file(file_path):
+    """Load and check every record in one metrics file. Returns (valid records, skip/error messages)."""
+    records, messages = [], []
+    try:
+        for metrics in iter_metrics(file_path):
+            metrics, message = check_metrics(metrics, file_path)
+            if message:
+                messages.append(message)
+            else:
+                records.append(metrics)
+    except json.JSONDecodeError as e:
+        messages.append(f"Error decoding JSON in {file_path}: {e}")
+    except Exception as e:
+        messages.append(f"Unexpected error reading {file_path}: {e}")
+    return records, messages
+
+# Find all game_metrics_*.json (and line-delimited game_metrics_*.jsonl) files anywhere under the experiments directory
+metrics_paths = [
+    path
+    for pattern in ("game_metrics_*.json", "game_metrics_*.jsonl")
+    for path in glob.glob(os.path.join(root_dir, "**", pattern), recursive=True)
+]
 
-# Walk through the experiments directory to find all game_metrics_*.json files
-for dirpath, _, filenames in os.walk(root_dir):
-    for file_path in glob.glob(os.path.join(dirpath, "game_metrics_*.json")):
-        try:
-            with open(file_path, 'r') as f:
-                metrics = json.load(f)
-                # Verify that metrics is a dictionary
-                if not isinstance(metrics, dict):
-                    print(f"Skipping {file_path}: JSON is not a dictionary, got {type(metrics)}")
-                    continue
-                # Check for all required keys
-                missing_keys = [key for key in required_keys if key not in metrics]
-                if missing_keys:
-                    print(f"Skipping {file_path}: Missing keys {missing_keys}")
-                    continue
-                # Check if rounds_played is valid
-                if not isinstance(metrics['rounds_played'], (int, float)):
-                    print(f"Skipping {file_path}: Invalid rounds_played value {metrics['rounds_played']}")
-                    continue
-                # Extract experiment name and determine model
-                experiment_name = os.path.basename(os.path.dirname(file_path))
-                if experiment_name.startswith('experiment_seer_4o_'):
-                    model = '4o'
-                elif experiment_name.startswith('experiment_seer_'):
-                    model = '4o-mini'
-                else:
-                    print(f"Skipping {file_path}: Unknown model for experiment {experiment_name}")
-                    continue
-                metrics['experiment'] = experiment_name
-                metrics['model'] = model
-                all_metrics.append(metrics)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON in {file_path}: {e}")
-        except Exception as e:
-            print(f"Unexpected error reading {file_path}: {e}")
+# Reading thousands of small files is I/O bound, so they are parsed on a thread pool.
+# map() yields results in file order, so the skip messages print in a stable order.
+with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+    for records, messages in pool.map(parse_metrics_file, metrics_paths):
+        for message in messages:
+            print(message)
+        all_metrics.extend(records)
 
 # Check if any valid data Eurosystem
 # Convert to a pandas DataFrame
@@ -61,7 +110,13 @@ if not all_metrics:
     exit()
 
 try:
-    df = pd.DataFrame(all_metrics)
+    # Hand pandas one list per column (keys in first-seen order, as DataFrame(records) would
+    # order them) rather than a list of row dicts it has to transpose itself
+    columns = dict.fromkeys(key for metrics in all_metrics for key in metrics)
+    df = pd.DataFrame({key: [metrics.get(key, np.nan) for metrics in all_metrics] for key in columns})
+    # Low-cardinality labels: category dtype lets groupby/value_counts work on integer codes
+    df['winner'] = df['winner'].astype('category')
+    df['model'] = df['model'].astype('category')
 except Exception as e:
     print(f"Error creating DataFrame: {e}")
     print("Sample data:", all_metrics[:2])
@@ -84,24 +139,28 @@ for col in numeric_columns:
     else:
         print(f"Warning: Column {col} not found in DataFrame")
 
-# Check for missing values
-if df[numeric_columns].isna().any().any():
+# Check for missing values (one NaN mask, reused for the per-column counts)
+na_mask = df[numeric_columns].isna()
+if na_mask.values.any():
     print("Warning: Some numeric columns contain NaN values:")
-    print(df[numeric_columns].isna().sum())
+    print(na_mask.sum())
 
 # Save combined data to CSV
 df.to_csv('combined_metrics_comp.csv', index=False)
 print("Combined data saved to 'combined_metrics_comp.csv'")
 
-# Compute summary statistics by model
+# Compute summary statistics by model (one groupby pass each, shared with the win-rate chart below)
+win_counts = df.groupby(['model', 'winner'], observed=True).size().unstack(fill_value=0)
+games_per_model = df['model'].value_counts()
+model_means = df.groupby('model', observed=True)[numeric_columns].mean().fillna(0)
 for model in df['model'].unique():
-    model_df = df[df['model'] == model]
-    total_games = len(model_df)
-    villager_wins = len(model_df[model_df['winner'] == 'Villagers win!'])
-    werewolf_wins = len(model_df[model_df['winner'] == 'Werewolves win!'])
+    model_wins = win_counts.loc[model] if model in win_counts.index else {}
+    total_games = games_per_model[model]
+    villager_wins = model_wins.get('Villagers win!', 0)
+    werewolf_wins = model_wins.get('Werewolves win!', 0)
     villager_win_rate = villager_wins / total_games * 100 if total_games > 0 else 0
     werewolf_win_rate = werewolf_wins / total_games * 100 if total_games > 0 else 0
-    avg_rounds = model_df['rounds_played'].mean() if not model_df['rounds_played'].isna().all() else 0
+    avg_rounds = model_means.loc[model, 'rounds_played']
 
     print(f"\nSummary Statistics for {model}:")
     print(f"Total Games: {total_games}")
@@ -110,19 +169,20 @@ for model in df['model'].unique():
     print(f"Average Rounds per Game: {avg_rounds:.2f}")
     print("Average Metrics:")
     for col in numeric_columns:
-        avg_value = model_df[col].mean() if col in model_df.columns and not model_df[col].isna().all() else 0
-        print(f"{col}: {avg_value:.4f}")
+        print(f"{col}: {model_means.loc[model, col]:.4f}")
 
 # Set up plotting style
 sns.set(style="whitegrid", palette="muted")
+# Resolve the winner and model colours once and pass the same palette objects to every plot
+WIN_PALETTE = sns.color_palette(['#4CAF50', '#F44336'])
+MODEL_PALETTE = sns.color_palette(['#1f77b4', '#ff7f0e'])
 plt.rcParams.update({'font.size': 12, 'figure.figsize': (10, 6)})
 
 # Create directory for saving plots_model_comp
 os.makedirs('plots_model_comp', exist_ok=True)
 
 # 1. Win Rates Bar Chart by Model
-win_rates = df.groupby(['model', 'winner']).size().unstack(fill_value=0)
-win_rates = win_rates.div(win_rates.sum(axis=1), axis=0) * 100
+win_rates = win_counts.div(win_counts.sum(axis=1), axis=0) * 100
 plt.figure(figsize=(10, 6))
 win_rates.plot(kind='bar', color=['#4CAF50', '#F44336'])
 plt.title('Win Rates by Model: Villagers vs. Werewolves')
@@ -130,29 +190,28 @@ plt.xlabel('Model')
 plt.ylabel('Percentage of Games (%)')
 plt.xticks(rotation=0)
 plt.legend(title='Winner')
-plt.tight_layout()
-plt.savefig('plots_model_comp/win_rates_by_model.png', dpi=300)
+plt.savefig('plots_model_comp/win_rates_by_model.png', bbox_inches='tight', **SAVE_OPTIONS)
 plt.close()
 print("Saved win_rates_by_model.png")
 
-# 2. Box plots_model_comp for Numeric Metrics by Model and Winner
+# 2. Box plots_model_comp for Numeric Metrics by Model and Winner (one figure, cleared and redrawn for each metric)
+fig, ax = plt.subplots(figsize=(12, 6))
 for col in numeric_columns:
     if col in df.columns:
-        plt.figure(figsize=(12, 6))
-        sns.boxplot(x='model', y=col, hue='winner', data=df, palette=['#4CAF50', '#F44336'])
-        plt.title(f'{col.replace("_", " ").title()} by Model and Winner')
-        plt.xlabel('Model')
-        plt.ylabel(col.replace("_", " ").title())
-        plt.legend(title='Winner')
-        plt.tight_layout()
-        plt.savefig(f'plots_model_comp/{col}_by_model_winner.png', dpi=300)
-        plt.close()
+        ax.clear()
+        sns.boxplot(x='model', y=col, hue='winner', data=df, palette=WIN_PALETTE, ax=ax)
+        ax.set_title(f'{col.replace("_", " ").title()} by Model and Winner')
+        ax.set_xlabel('Model')
+        ax.set_ylabel(col.replace("_", " ").title())
+        ax.legend(title='Winner')
+        fig.savefig(f'plots_model_comp/{col}_by_model_winner.png', bbox_inches='tight', **SAVE_OPTIONS)
         print(f"Saved {col}_by_model_winner.png")
     else:
         print(f"Skipping box plot for {col}: Column not found")
+plt.close(fig)
 
 # 3. Bar Chart of Average Metrics by Model
-avg_metrics = df.groupby('model')[numeric_columns].mean().T
+avg_metrics = df.groupby('model', observed=True)[numeric_columns].mean().T
 plt.figure(figsize=(12, 6))
 avg_metrics.plot(kind='bar', color=['#1f77b4', '#ff7f0e'])
 plt.title('Average Metrics by Model')
@@ -160,38 +219,36 @@ plt.xlabel('Metric')
 plt.ylabel('Average Value')
 plt.xticks(rotation=45, ha='right')
 plt.legend(title='Model')
-plt.tight_layout()
-plt.savefig('plots_model_comp/avg_metrics_by_model.png', dpi=300)
+plt.savefig('plots_model_comp/avg_metrics_by_model.png', bbox_inches='tight', **SAVE_OPTIONS)
 plt.close()
 print("Saved avg_metrics_by_model.png")
 
 # 4. Violin plots_model_comp for Key Metrics by Model
 key_metrics = ['seer_accuracy', 'voting_accuracy', 'werewolf_deception_rate']
+fig, ax = plt.subplots(figsize=(10, 6))
 for col in key_metrics:
     if col in df.columns:
-        plt.figure(figsize=(10, 6))
-        sns.violinplot(x='model', y=col, data=df, palette=['#1f77b4', '#ff7f0e'])
-        plt.title(f'{col.replace("_", " ").title()} Distribution by Model')
-        plt.xlabel('Model')
-        plt.ylabel(col.replace("_", " ").title())
-        plt.tight_layout()
-        plt.savefig(f'plots_model_comp/{col}_violin_by_model.png', dpi=300)
-        plt.close()
+        ax.clear()
+        sns.violinplot(x='model', y=col, data=df, palette=MODEL_PALETTE, ax=ax)
+        ax.set_title(f'{col.replace("_", " ").title()} Distribution by Model')
+        ax.set_xlabel('Model')
+        ax.set_ylabel(col.replace("_", " ").title())
+        fig.savefig(f'plots_model_comp/{col}_violin_by_model.png', bbox_inches='tight', **SAVE_OPTIONS)
         print(f"Saved {col}_violin_by_model.png")
     else:
         print(f"Skipping violin plot for {col}: Column not found")
+plt.close(fig)
 
 # 5. Scatter Plot: Seer Accuracy vs. Voting Accuracy by Model
 if 'seer_accuracy' in df.columns and 'voting_accuracy' in df.columns:
     plt.figure(figsize=(10, 6))
     sns.scatterplot(x='seer_accuracy', y='voting_accuracy', hue='model', style='model',
-                    data=df, palette=['#1f77b4', '#ff7f0e'], s=100)
+                    data=df, palette=MODEL_PALETTE, s=100)
     plt.title('Seer Accuracy vs. Voting Accuracy by Model')
     plt.xlabel('Seer Accuracy')
     plt.ylabel('Voting Accuracy')
     plt.legend(title='Model')
-    plt.tight_layout()
-    plt.savefig('plots_model_comp/seer_vs_voting_accuracy_by_model.png', dpi=300)
+    plt.savefig('plots_model_comp/seer_vs_voting_accuracy_by_model.png', bbox_inches='tight', **SAVE_OPTIONS)
     plt.close()
     print("Saved seer_vs_voting_accuracy_by_model.png")
 else:
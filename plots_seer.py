@@ -1,10 +1,37 @@
 import os
 import json
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Headless: only PNGs are written, so skip GUI backend setup
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import glob
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Optional: a much faster JSON parser
+    _loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    _loads = json.loads  # Accepts bytes as well, so both parsers read the files in binary mode
+
+def _load_json(path):
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+def iter_metrics(path):
+    """Yield the metrics records in a file: one per line for .jsonl, otherwise the single JSON document."""
+    if path.endswith('.jsonl'):
+        # Parse line by line, so a large results file never has to sit in memory whole
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
+    else:
+        yield _load_json(path)
+
+# PNG save settings: 150 dpi and fast zlib compression keep the many small plots quick to write
+SAVE_OPTIONS = {'dpi': 150, 'pil_kwargs': {'compress_level': 1}}
 
 # Set the root directory where the experiment folders are located
 root_dir = "experiments_allan"
@@ -18,35 +45,55 @@ required_keys = [
     'seer_reveal_rate', 'suspicion_change_rate', 'vote_discussion_alignment',
     'statement_variety_rate', 'werewolf_deception_rate'
 ]
+REQUIRED_KEY_SET = frozenset(required_keys)  # For the per-file check; required_keys keeps the reporting order
+
+def check_metrics(metrics, file_path):
+    """Check one metrics record. Returns (metrics, None), or (None, reason) when the record is skipped."""
+    # Verify that metrics is a dictionary
+    if not isinstance(metrics, dict):
+        return None, f"Skipping {file_path}: JSON is not a dictionary, got {type(metrics)}"
+    # Check for all required keys
+    missing_keys = REQUIRED_KEY_SET.difference(metrics)
+    if missing_keys:
+        return None, f"Skipping {file_path}: Missing keys {[key for key in required_keys if key in missing_keys]}"
+    # Check if rounds_played is valid
+    if not isinstance(metrics['rounds_played'], (int, float)):
+        return None, f"Skipping {file_path}: Invalid rounds_played value {metrics['rounds_played']}"
+    # Extract experiment name from the parent directory
+    experiment_name = os.path.basename(os.path.dirname(file_path))
+    metrics['experiment'] = experiment_name
+    return metrics, None
+
+def parse_metrics_file(file_path):
+    """Load and check every record in one metrics file. Returns (valid records, skip/error messages)."""
+    records, messages = [], []
+    try:
+        for metrics in iter_metrics(file_path):
+            metrics, message = check_metrics(metrics, file_path)
+            if message:
+                messages.append(message)
+            else:
+                records.append(metrics)
+    except json.JSONDecodeError as e:
+        messages.append(f"Error decoding JSON in {file_path}: {e}")
+    except Exception as e:
+        messages.append(f"Unexpected error reading {file_path}: {e}")
+    return records, messages
+
+# Find all game_metrics_*.json (and line-delimited game_metrics_*.jsonl) files anywhere under the experiments directory
+metrics_paths = [
+    path
+    for pattern in ("game_metrics_*.json", "game_metrics_*.jsonl")
+    for path in glob.glob(os.path.join(root_dir, "**", pattern), recursive=True)
+]
 
-# Walk through the experiments directory to find all game_metrics_*.json files
-for dirpath, _, filenames in os.walk(root_dir):
-    # Look for files matching game_metrics_*.json
-    for file_path in glob.glob(os.path.join(dirpath, "game_metrics_*.json")):
-        try:
-            with open(file_path, 'r') as f:
-                metrics = json.load(f)
-                # Verify that metrics is a dictionary
-                if not isinstance(metrics, dict):
-                    print(f"Skipping {file_path}: JSON is not a dictionary, got {type(metrics)}")
-                    continue
-                # Check for all required keys
-                missing_keys = [key for key in required_keys if key not in metrics]
-                if missing_keys:
-                    print(f"Skipping {file_path}: Missing keys {missing_keys}")
-                    continue
-                # Check if rounds_played is valid
-                if not isinstance(metrics['rounds_played'], (int, float)):
-                    print(f"Skipping {file_path}: Invalid rounds_played value {metrics['rounds_played']}")
-                    continue
-                # Extract experiment name from the parent directory
-                experiment_name = os.path.basename(os.path.dirname(file_path))
-                metrics['experiment'] = experiment_name
-                all_metrics.append(metrics)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON in {file_path}: {e}")
-        except Exception as e:
-            print(f"Unexpected error reading {file_path}: {e}")
+# Reading thousands of small files is I/O bound, so they are parsed on a thread pool.
+# map() yields results in file order, so the skip messages print in a stable order.
+with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+    for records, messages in pool.map(parse_metrics_file, metrics_paths):
+        for message in messages:
+            print(message)
+        all_metrics.extend(records)
 
 # Check if any valid data was collected
 if not all_metrics:
@@ -55,7 +102,12 @@ if not all_metrics:
 
 # Convert to a pandas DataFrame
 try:
-    df = pd.DataFrame(all_metrics)
+    # Hand pandas one list per column (keys in first-seen order, as DataFrame(records) would
+    # order them) rather than a list of row dicts it has to transpose itself
+    columns = dict.fromkeys(key for metrics in all_metrics for key in metrics)
+    df = pd.DataFrame({key: [metrics.get(key, np.nan) for metrics in all_metrics] for key in columns})
+    # Low-cardinality label: category dtype lets value_counts and comparisons work on integer codes
+    df['winner'] = df['winner'].astype('category')
 except Exception as e:
     print(f"Error creating DataFrame: {e}")
     print("Sample data:", all_metrics[:2])
@@ -79,22 +131,24 @@ for col in numeric_columns:
     else:
         print(f"Warning: Column {col} not found in DataFrame")
 
-# Check for missing values and warn if any
-if df[numeric_columns].isna().any().any():
+# Check for missing values and warn if any (one NaN mask, reused for the per-column counts)
+na_mask = df[numeric_columns].isna()
+if na_mask.values.any():
     print("Warning: Some numeric columns contain NaN values. Check data integrity.")
-    print(df[numeric_columns].isna().sum())
+    print(na_mask.sum())
 
 # Save combined data to CSV
 df.to_csv('combined_metrics.csv', index=False)
 print("Combined data saved to 'combined_metrics.csv'")
 
-# Compute summary statistics
+# Compute summary statistics (all column means in one vectorized pass; all-NaN columns report 0)
+column_means = df[numeric_columns].mean().fillna(0)
 total_games = len(df)
 villager_wins = len(df[df['winner'] == 'Villagers win!'])
 werewolf_wins = len(df[df['winner'] == 'Werewolves win!'])
 villager_win_rate = villager_wins / total_games * 100 if total_games > 0 else 0
 werewolf_win_rate = werewolf_wins / total_games * 100 if total_games > 0 else 0
-avg_rounds = df['rounds_played'].mean() if not df['rounds_played'].isna().all() else 0
+avg_rounds = column_means['rounds_played']
 
 # Print summary statistics
 print("\nSummary Statistics:")
@@ -103,12 +157,13 @@ print(f"Villager Wins: {villager_wins} ({villager_win_rate:.2f}%)")
 print(f"Werewolf Wins: {werewolf_wins} ({werewolf_win_rate:.2f}%)")
 print(f"Average Rounds per Game: {avg_rounds:.2f}")
 print("\nAverage Metrics:")
-for col in numeric_columns:
-    avg_value = df[col].mean() if col in df.columns and not df[col].isna().all() else 0
+for col, avg_value in column_means.items():
     print(f"{col}: {avg_value:.4f}")
 
 # Set up plotting style
 sns.set(style="whitegrid", palette="muted")
+# Resolve the winner colours once and pass the same palette object to every plot
+WIN_PALETTE = sns.color_palette(['#4CAF50', '#F44336'])
 plt.rcParams.update({'font.size': 12, 'figure.figsize': (10, 6)})
 
 # Create directory for saving plots_allan
@@ -122,33 +177,31 @@ plt.title('Win Rates: Villagers vs. Werewolves')
 plt.xlabel('Winner')
 plt.ylabel('Percentage of Games (%)')
 plt.xticks(rotation=0)
-plt.tight_layout()
-plt.savefig('plots_allan/win_rates.png', dpi=300)
+plt.savefig('plots_allan/win_rates.png', bbox_inches='tight', **SAVE_OPTIONS)
 plt.close()
 print("Saved win_rates.png")
 
-# 2. Box plots_allan for Numeric Metrics by Winner
+# 2. Box plots_allan for Numeric Metrics by Winner (one figure, cleared and redrawn for each metric)
+fig, ax = plt.subplots(figsize=(10, 6))
 for col in numeric_columns:
     if col in df.columns:
-        plt.figure(figsize=(10, 6))
-        sns.boxplot(x='winner', y=col, data=df, palette=['#4CAF50', '#F44336'])
-        plt.title(f'{col.replace("_", " ").title()} by Game Winner')
-        plt.xlabel('Winner')
-        plt.ylabel(col.replace("_", " ").title())
-        plt.tight_layout()
-        plt.savefig(f'plots_allan/{col}_by_winner.png', dpi=300)
-        plt.close()
+        ax.clear()
+        sns.boxplot(x='winner', y=col, data=df, palette=WIN_PALETTE, ax=ax)
+        ax.set_title(f'{col.replace("_", " ").title()} by Game Winner')
+        ax.set_xlabel('Winner')
+        ax.set_ylabel(col.replace("_", " ").title())
+        fig.savefig(f'plots_allan/{col}_by_winner.png', bbox_inches='tight', **SAVE_OPTIONS)
         print(f"Saved {col}_by_winner.png")
     else:
         print(f"Skipping box plot for {col}: Column not found")
+plt.close(fig)
 
 # 3. Correlation Heatmap
 plt.figure(figsize=(12, 10))
 corr_matrix = df[numeric_columns].corr()
 sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', vmin=-1, vmax=1, center=0)
 plt.title('Correlation Heatmap of Game Metrics')
-plt.tight_layout()
-plt.savefig('plots_allan/correlation_heatmap.png', dpi=300)
+plt.savefig('plots_allan/correlation_heatmap.png', bbox_inches='tight', **SAVE_OPTIONS)
 plt.close()
 print("Saved correlation_heatmap.png")
 
@@ -156,13 +209,12 @@ print("Saved correlation_heatmap.png")
 if 'seer_accuracy' in df.columns and 'voting_accuracy' in df.columns:
     plt.figure(figsize=(10, 6))
     sns.scatterplot(x='seer_accuracy', y='voting_accuracy', hue='winner', style='winner',
-                    data=df, palette=['#4CAF50', '#F44336'], s=100)
+                    data=df, palette=WIN_PALETTE, s=100)
     plt.title('Seer Accuracy vs. Voting Accuracy')
     plt.xlabel('Seer Accuracy')
     plt.ylabel('Voting Accuracy')
     plt.legend(title='Winner')
-    plt.tight_layout()
-    plt.savefig('plots_allan/seer_vs_voting_accuracy.png', dpi=300)
+    plt.savefig('plots_allan/seer_vs_voting_accuracy.png', bbox_inches='tight', **SAVE_OPTIONS)
     plt.close()
     print("Saved seer_vs_voting_accuracy.png")
 else:
@@ -172,13 +224,12 @@ else:
 if 'rounds_played' in df.columns and 'seer_accuracy' in df.columns:
     plt.figure(figsize=(10, 6))
     sns.scatterplot(x='rounds_played', y='seer_accuracy', hue='winner', style='winner',
-                    data=df, palette=['#4CAF50', '#F44336'], s=100)
+                    data=df, palette=WIN_PALETTE, s=100)
     plt.title('Rounds Played vs. Seer Accuracy')
     plt.xlabel('Rounds Played')
     plt.ylabel('Seer Accuracy')
     plt.legend(title='Winner')
-    plt.tight_layout()
-    plt.savefig('plots_allan/rounds_vs_seer_accuracy.png', dpi=300)
+    plt.savefig('plots_allan/rounds_vs_seer_accuracy.png', bbox_inches='tight', **SAVE_OPTIONS)
     plt.close()
     print("Saved rounds_vs_seer_accuracy.png")
 else:
@@ -191,8 +242,7 @@ if 'rounds_played' in df.columns and 'seer_accuracy' in df.columns:
     plt.title('Seer Accuracy by Rounds Played')
     plt.xlabel('Rounds Played')
     plt.ylabel('Seer Accuracy')
-    plt.tight_layout()
-    plt.savefig('plots_allan/seer_accuracy_by_rounds.png', dpi=300)
+    plt.savefig('plots_allan/seer_accuracy_by_rounds.png', bbox_inches='tight', **SAVE_OPTIONS)
     plt.close()
     print("Saved seer_accuracy_by_rounds.png")
 else:
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+# The game module checks its Azure settings at import time
+os.environ.setdefault("AZURE_OPENAI_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.invalid")
+os.environ.setdefault("AZURE_OPENAI_DEPLOYMENT", "test-deployment")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_optimized_log as game  # noqa: E402
+
+
+class FakeStream:
+    """Async iterator over streamed chat chunks, one per text piece"""
+
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.chat = SimpleNamespace(completions=self)
+        self.stream = stream
+
+    async def create(self, **kwargs):
+        return self.stream
+
+
+def stream_statement(pieces):
+    stream = FakeStream(pieces)
+    text = asyncio.run(game.WerewolfGame._complete(None, FakeClient(stream), "m", [], {}, stream=True))
+    assert stream.closed
+    return text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Hmm... Alice is lying!", None),
+    ("Hmm... Alice is lying! ", "Hmm... Alice is lying!"),
+    ("I suspect Bob... he has been too quiet. Vote him.", "I suspect Bob... he has been too quiet."),
+    ("Her accuracy is 0.5 so far. Trust her. Really.", "Her accuracy is 0.5 so far. Trust her."),
+    ("Why?! Nobody knows. Fine.", "Why?! Nobody knows."),
+])
+def test_cut_after_sentences(text, expected):
+    assert game.cut_after_sentences(text, 2) == expected
+
+
+@pytest.mark.parametrize("pieces, expected", [
+    (["Hmm.", "..", " Alice is lying!"], "Hmm... Alice is lying!"),
+    (["I suspect Bob.", ".. he has been too quiet."], "I suspect Bob... he has been too quiet."),
+    (["Her accuracy is 0.", "5 so far. Trust her.", " Really."], "Her accuracy is 0.5 so far. Trust her."),
+    (["One. Two. Three."], "One. Two."),
+])
+def test_streamed_statement_stops_after_two_sentences(pieces, expected):
+    assert stream_statement(pieces) == expected
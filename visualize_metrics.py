@@ -1,48 +1,69 @@
 import os
 import json
 import glob
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Headless: only PNGs are written, so skip GUI backend setup
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+try:
+    import orjson  # Optional: a much faster JSON parser
+    _loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    _loads = json.loads  # Accepts bytes as well, so both parsers read the files in binary mode
+
+def _load_json(path):
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+# Fast zlib compression for the saved PNGs (larger files, much quicker saves)
+PNG_OPTIONS = {'compress_level': 1}
+
 def find_metrics_files():
     """Find all metrics.json files in game_logs directories"""
     # Look for metrics.json files in any directory that starts with game_logs_
     metrics_files = glob.glob("game_logs_*/metrics.json")
     return metrics_files
 
+def load_metrics_file(file_path):
+    """Load one metrics.json and tag it with its game_id. Returns (data, None), or (None, error message)."""
+    try:
+        # Extract game_id from the directory name
+        game_id = os.path.basename(os.path.dirname(file_path)).replace("game_logs_", "")
+        
+        data = _load_json(file_path)
+        
+        # Add game_id to the data
+        data['game_id'] = game_id
+        
+        return data, None
+            
+    except Exception as e:
+        return None, f"Error loading {file_path}: {e}"
+
 def load_metrics_data(metrics_files):
     """Load and combine data from all metrics.json files"""
     all_data = []
     
-    for file_path in metrics_files:
-        try:
-            # Extract game_id from the directory name
-            game_id = os.path.basename(os.path.dirname(file_path)).replace("game_logs_", "")
-            
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                
-                # Add game_id to the data
-                data['game_id'] = game_id
-                
-                # Flatten nested dictionaries for easier analysis
-                flattened_data = {}
-                for key, value in data.items():
-                    if isinstance(value, dict):
-                        for subkey, subvalue in value.items():
-                            flattened_data[f"{key}_{subkey}"] = subvalue
-                    else:
-                        flattened_data[key] = value
-                
-                all_data.append(flattened_data)
-                
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(all_data)
+    # The files are small and reading them is I/O bound, so they load on a thread pool;
+    # map() keeps file order, so rows and error messages come out in a stable order
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for row, error in pool.map(load_metrics_file, metrics_files):
+            if error:
+                print(error)
+            else:
+                all_data.append(row)
+    
+    # Convert to DataFrame, flattening one level of nested dictionaries into "<key>_<subkey>"
+    # columns for easier analysis (json_normalize does this for all rows in one pass)
+    df = pd.json_normalize(all_data, sep='_', max_level=1)
+    if 'winner' in df.columns:
+        # Low-cardinality label: category dtype lets value_counts and comparisons work on integer codes
+        df['winner'] = df['winner'].astype('category')
     return df
 
 def create_visualizations(df):
@@ -63,7 +84,7 @@ def create_visualizations(df):
     outcome_counts = df['winner'].value_counts()
     plt.pie(outcome_counts, labels=outcome_counts.index, autopct='%1.1f%%', startangle=90)
     plt.title('Game Outcomes')
-    plt.savefig(f"{output_dir}/game_outcomes.png")
+    plt.savefig(f"{output_dir}/game_outcomes.png", pil_kwargs=PNG_OPTIONS)
     plt.close()
     
     # 2. Rounds Played Distribution
@@ -72,7 +93,7 @@ def create_visualizations(df):
     plt.title('Distribution of Rounds Played')
     plt.xlabel('Number of Rounds')
     plt.ylabel('Frequency')
-    plt.savefig(f"{output_dir}/rounds_played_distribution.png")
+    plt.savefig(f"{output_dir}/rounds_played_distribution.png", pil_kwargs=PNG_OPTIONS)
     plt.close()
     
     # 3. Seer Performance
@@ -82,8 +103,7 @@ def create_visualizations(df):
     plt.title('Seer Performance Metrics')
     plt.ylabel('Value')
     plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/seer_performance.png")
+    plt.savefig(f"{output_dir}/seer_performance.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
     plt.close()
     
     # 4. Werewolf Performance
@@ -93,8 +113,7 @@ def create_visualizations(df):
     plt.title('Werewolf Performance Metrics')
     plt.ylabel('Value')
     plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/werewolf_performance.png")
+    plt.savefig(f"{output_dir}/werewolf_performance.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
     plt.close()
     
     # 5. Village Performance
@@ -104,8 +123,7 @@ def create_visualizations(df):
     plt.title('Village Performance Metrics')
     plt.ylabel('Value')
     plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/village_performance.png")
+    plt.savefig(f"{output_dir}/village_performance.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
     plt.close()
     
     # 6. Discussion Metrics
@@ -117,17 +135,23 @@ def create_visualizations(df):
     plt.title('Discussion Metrics')
     plt.ylabel('Value')
     plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/discussion_metrics.png")
+    plt.savefig(f"{output_dir}/discussion_metrics.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
     plt.close()
     
     # 7. Correlation Heatmap
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+    numeric_df = df.select_dtypes(include=[np.number])
+    values = numeric_df.to_numpy(dtype=np.float64, copy=False)
+    if np.isnan(values).any():
+        # pandas drops missing values pair by pair, where np.corrcoef would turn whole rows/columns to NaN
+        corr = numeric_df.corr()
+    else:
+        # One vectorized pass over the whole matrix instead of pandas' per-column-pair loop
+        corr = pd.DataFrame(np.atleast_2d(np.corrcoef(values, rowvar=False)),
+                            index=numeric_df.columns, columns=numeric_df.columns)
     plt.figure(figsize=(14, 12))
-    sns.heatmap(df[numeric_cols].corr(), annot=True, cmap='coolwarm', fmt='.2f')
+    sns.heatmap(corr, annot=True, cmap='coolwarm', fmt='.2f')
     plt.title('Correlation Heatmap of Metrics')
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/correlation_heatmap.png")
+    plt.savefig(f"{output_dir}/correlation_heatmap.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
     plt.close()
     
     # 8. Time Series of Key Metrics (if game_id contains timestamp)
@@ -146,8 +170,7 @@ def create_visualizations(df):
         plt.ylabel('Value')
         plt.legend()
         plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/metrics_over_time.png")
+        plt.savefig(f"{output_dir}/metrics_over_time.png", pil_kwargs=PNG_OPTIONS, bbox_inches='tight')
         plt.close()
     except:
         print("Could not create time series plot. Game IDs may not be timestamps.")